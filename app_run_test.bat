@@ -1,4 +1,5 @@
 dropdb event_management_test
 createdb event_management_test
 psql event_management_test < setup.psql
-python test_app.py
\ No newline at end of file
+python test_app.py
+python test_performance.py
\ No newline at end of file
@@ -3,6 +3,7 @@ from flask import request
 from functools import wraps
 from jose import jwt
 from urllib.request import urlopen
+from auth.ratelimit import limiter
 import os
 
 
@@ -25,6 +26,23 @@ class AuthError(Exception):
         self.error = error
         self.status_code = status_code
 
+# RateLimitError Exception
+# Raised when a caller exceeds the request rate of a permission.
+
+class RateLimitError(AuthError):
+    """
+    Authentication error for callers over their rate limit (429).
+
+    Attributes:
+        retry_after (int): Seconds until the caller may retry.
+    """
+    def __init__(self, retry_after):
+        super().__init__({
+            'code': 'rate_limited',
+            'description': 'Too many requests. Retry after %d second(s).' % retry_after
+        }, 429)
+        self.retry_after = retry_after
+
 # Get Token Auth Header
 # Extracts and validates the authorization token from the request header.
 
@@ -181,6 +199,47 @@ def verify_decode_jwt(token):
     }, 400)
 
 
+# Check Rate Limit
+# Counts the request against the caller's rate limit for the permission.
+
+def check_rate_limit(permission, caller):
+    """
+    Applies the token bucket rate limit of a permission to a caller.
+
+    Args:
+        permission (str): The permission the request uses.
+        caller (str): The JWT subject, or the client IP when unauthenticated.
+
+    Raises:
+        RateLimitError: If the caller has no tokens left for the permission.
+    """
+    retry_after = limiter.check(permission, caller)
+    if retry_after:
+        raise RateLimitError(retry_after)
+
+
+# Rate Limited
+# A decorator to rate limit routes that do not require authorization.
+
+def rate_limited(permission=''):
+    """
+    Decorator to rate limit unauthenticated routes by client IP.
+
+    Args:
+        permission (str): The name of the limit to apply.
+
+    Raises:
+        RateLimitError: If the client has no tokens left.
+    """
+    def rate_limited_decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            check_rate_limit(permission, request.remote_addr)
+            return f(*args, **kwargs)
+        return wrapper
+    return rate_limited_decorator
+
+
 # Requires Authorization
 # A decorator to enforce authentication and authorization for protected routes.
 
@@ -195,6 +254,7 @@ def requires_auth(permission=''):
         - Retrieves the token using get_token_auth_header().
         - Verifies and decodes the token using verify_decode_jwt().
         - Validates the required permission using check_permissions().
+        - Applies the permission's rate limit to the token's subject.
         - Passes the decoded payload to the decorated function.
 
     Returns:
@@ -202,6 +262,7 @@ def requires_auth(permission=''):
 
     Raises:
         AuthError: For missing tokens, invalid permissions, or JWT verification issues.
+        RateLimitError: If the caller is over the permission's rate limit.
     """
     def requires_auth_decorator(f):
         @wraps(f)
@@ -209,6 +270,7 @@ def requires_auth(permission=''):
             token = get_token_auth_header()
             payload = verify_decode_jwt(token)
             check_permissions(permission, payload)
+            check_rate_limit(permission, payload.get('sub') or request.remote_addr)
             return f(payload, *args, **kwargs)
         return wrapper
     return requires_auth_decorator
@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+
+# Sustained requests per second and burst size of each caller, per permission
+RATE_LIMITS = {
+    'read:events': (20, 100),
+    'create:events': (2, 20),
+    'update:events': (5, 50),
+    'delete:events': (2, 20),
+    'create:schedule': (5, 50),
+    'manage:attendees': (10, 100),
+}
+DEFAULT_RATE_LIMIT = (5, 50)
+
+# Idle buckets are swept once every this many requests
+SWEEP_INTERVAL = 10000
+
+# RateLimitBackend
+# Storage of the token buckets, shared by the limiter's callers.
+
+class RateLimitBackend:
+    """
+    Interface of the token bucket stores.
+
+    The in-memory backend below limits each worker process separately. A
+    shared store (Redis, memcached, ...) implementing take() atomically
+    enforces the limits across all workers instead.
+    """
+    def take(self, key, rate, burst):
+        """
+        Takes one token from the bucket of a key, refilled at rate tokens per
+        second up to burst tokens. A new bucket starts full.
+
+        Returns:
+            float: 0 when a token was taken, otherwise the seconds until one
+                   is available.
+        """
+        raise NotImplementedError
+
+    def reset(self):
+        """Refills all buckets."""
+        raise NotImplementedError
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Token buckets in a dict of this worker process. Each bucket is only its
+    token count and the time it was last updated, so a request costs one
+    lookup and some arithmetic under a lock.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.requests = 0
+
+    def take(self, key, rate, burst):
+        now = time.monotonic()
+        with self.lock:
+            self.requests += 1
+            if self.requests % SWEEP_INTERVAL == 0:
+                self._sweep(now)
+            bucket = self.buckets.get(key)
+            tokens = burst if bucket is None else min(burst, bucket[0] + (now - bucket[1]) * rate)
+            if tokens >= 1:
+                self.buckets[key] = (tokens - 1, now, now + (burst - tokens + 1) / rate)
+                return 0
+            self.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+            return (1 - tokens) / rate
+
+    def _sweep(self, now):
+        # A bucket that has refilled is the same as no bucket
+        self.buckets = {key: bucket for key, bucket in self.buckets.items() if bucket[2] > now}
+
+    def reset(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+# RateLimiter
+# Applies the per-permission limits to callers.
+
+class RateLimiter:
+    """
+    Token bucket rate limiter, with one bucket per caller and permission.
+
+    Attributes:
+        backend (RateLimitBackend): Store of the buckets.
+        limits (dict): (rate, burst) of each permission.
+    """
+    def __init__(self, backend=None):
+        self.backend = backend or MemoryBackend()
+        self.limits = dict(RATE_LIMITS)
+
+    def check(self, permission, caller):
+        """
+        Counts a request of a caller against the limit of a permission.
+
+        Returns:
+            int: 0 when the request is allowed, otherwise the whole seconds
+                 the caller should wait before retrying.
+        """
+        rate, burst = self.limits.get(permission, DEFAULT_RATE_LIMIT)
+        retry_after = self.backend.take(f'{permission}:{caller}', rate, burst)
+        return math.ceil(retry_after)
+
+    def reset(self):
+        self.backend.reset()
+
+
+limiter = RateLimiter()
@@ -1,11 +1,215 @@
 import os
-from flask import Flask, request, abort, jsonify
+import json
+from flask import Flask, Response, current_app, request, abort, jsonify, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-from models import setup_db, db, Event, Attendee, Schedule
-from auth.auth import AuthError, requires_auth
-from datetime import datetime
+from models import setup_db, db, Event, Attendee, Schedule, WaitlistEntry, Change, OrganizerStats, Job, load_archived_event
+from auth.auth import AuthError, RateLimitError, requires_auth, rate_limited
+from flaskr.stream import broker, event_stream
+from flaskr.ical import calendar_feed, feed_etag, attendee_event_ids
+from flaskr.jobs import runner
+from flaskr.idempotency import idempotent
+from flaskr.snapshot import EventSnapshot
+from datetime import date, datetime, timedelta
 from flask import Blueprint, jsonify, request, abort
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+
+EVENTS_PER_PAGE = 10
+ATTENDEES_PER_PAGE = 50
+CHANGES_PER_PAGE = 100
+MAX_CHANGES_PER_PAGE = 1000
+MAX_BATCH_IDS = 1000
+# Widest window of GET /events/upcoming, in days (100 years)
+MAX_UPCOMING_DAYS = 36500
+# Largest value of the INTEGER id columns
+MAX_ID = 2 ** 31 - 1
+# Highest 'page' accepted: tables hold at most MAX_ID rows, so later pages are
+# always empty, and their OFFSET could overflow
+MAX_PAGE = MAX_ID
+# Events with more attendees and schedules than this are deleted in the background
+DELETE_SYNC_LIMIT = 1000
+MAX_IMPORT_ATTENDEES = 50000
+# Schedules fetched per round trip while streaming a day's timeline
+SCHEDULE_STREAM_CHUNK = 500
+
+# Cached event list of this worker, serving GET /events without filters
+event_snapshot = EventSnapshot(per_page=EVENTS_PER_PAGE)
+
+"""
+Function: parse_date_arg
+Purpose: Reads an ISO 8601 date or datetime from the query string.
+Parameters:
+    - name: Name of the query string argument.
+Returns: The parsed datetime, or None when the argument is absent.
+Raises: 400 Bad Request when the value is not a valid ISO 8601 date.
+"""
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        abort(400, f"Invalid '{name}' date: {value}")
+
+"""
+Function: parse_page_arg
+Purpose: Reads the 'page' query string argument of paginated lists.
+Parameters:
+    - default: Page returned when the argument is absent.
+Returns: The page number, or the default when the argument is absent.
+Raises: 400 Bad Request when the page is not between 1 and MAX_PAGE.
+"""
+
+def parse_page_arg(default=1):
+    if 'page' not in request.args:
+        return default
+    page = request.args.get('page', type=int)
+    if page is None or not 1 <= page <= MAX_PAGE:
+        abort(400, f"'page' must be a number between 1 and {MAX_PAGE}")
+    return page
+
+"""
+Function: get_events_batch
+Purpose: Builds the response of a multi-get of events.
+Parameters:
+    - ids: Requested event IDs, in the order the results are returned.
+    - include: Related collections to embed ('schedules', 'attendees').
+Returns: JSON response with one entry per requested ID; IDs that do not exist
+         get a {"id": ..., "error": 404} marker.
+Raises: 400 Bad Request for invalid or out of range IDs, too many IDs or an
+        unknown include.
+"""
+
+def get_events_batch(ids, include):
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+        abort(400, "'ids' must be a non-empty list of event ids")
+    if not all(0 < i <= MAX_ID for i in ids):
+        abort(400, f"Event ids must be between 1 and {MAX_ID}")
+    if len(ids) > MAX_BATCH_IDS:
+        abort(400, f"At most {MAX_BATCH_IDS} ids can be requested at once")
+    unknown = set(include) - {'schedules', 'attendees'}
+    if unknown:
+        abort(400, f"Invalid include: {', '.join(sorted(unknown))}")
+    try:
+        events = Event.load_many(ids, schedules='schedules' in include, attendees='attendees' in include)
+        data = [events.get(i, {'id': i, 'error': 404}) for i in ids]
+        return jsonify({"success": True, "events": data}), 200
+    except Exception as e:
+        abort(500, str(e))
+
+"""
+Function: parse_capacity
+Purpose: Validates the capacity of an event.
+Parameters:
+    - value: The requested capacity; None means unlimited.
+Returns: The capacity as an integer, or None.
+Raises: ValueError when the capacity is not a non-negative integer.
+"""
+
+def parse_capacity(value):
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+        raise ValueError("capacity must be a non-negative integer or null")
+    return value
+
+"""
+Function: check_schedule_slot
+Purpose: Validates a schedule time slot against the other schedules of its event.
+Parameters:
+    - event_id: ID of the event the schedule belongs to.
+    - start_time, end_time: The requested time slot.
+    - exclude_id: ID of the schedule being updated, if any (default: None).
+Raises:
+    - 400 Bad Request when the slot ends before it starts.
+    - 409 Conflict when the slot overlaps another schedule of the event.
+"""
+
+def check_schedule_slot(event_id, start_time, end_time, exclude_id=None):
+    if end_time <= start_time:
+        abort(400, "Schedule end_time must be after start_time")
+    conflicts = Schedule.find_conflicts(event_id, start_time, end_time, exclude_id)
+    if conflicts:
+        ids = ', '.join(str(s.id) for s in conflicts)
+        abort(409, f"Schedule overlaps with existing schedule(s): {ids}")
+
+"""
+Function: calendar_response
+Purpose: Builds the response of an iCalendar feed, supporting conditional
+         requests.
+Parameters:
+    - name: Calendar name shown by calendar apps.
+    - versions: Feed version of each event in the feed.
+Returns: 304 Not Modified when the client's If-None-Match still matches the
+         feed's ETag, otherwise the streamed text/calendar feed.
+"""
+
+def calendar_response(name, versions):
+    etag = feed_etag(versions)
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        response = Response(stream_with_context(calendar_feed(name, versions)), mimetype='text/calendar')
+    response.set_etag(etag)
+    # Calendar apps may keep the feed, but must revalidate it on every poll
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+"""
+Function: day_schedule_stream
+Purpose: Generates the JSON body of a day's schedule timeline.
+Parameters:
+    - day: The day of the timeline.
+    - organizer_id: Only include events of this organizer, when not None.
+    - occupancy: Per-hour counts from Schedule.hourly_occupancy.
+Yields: The JSON document in pieces, fetching the schedules in chunks of
+        SCHEDULE_STREAM_CHUNK rows (from a server-side cursor on Postgres)
+        so large days are never held in memory.
+"""
+
+def day_schedule_stream(day, organizer_id, occupancy):
+    yield json.dumps({"success": True, "date": day.isoformat(), "organizer_id": organizer_id,
+                      "occupancy": occupancy})[:-1] + ', "schedules": ['
+    total = 0
+    result = db.session.execute(
+        Schedule.for_day(day, organizer_id).execution_options(yield_per=SCHEDULE_STREAM_CHUNK)
+    )
+    for rows in result.partitions():
+        chunk = ', '.join(json.dumps({
+            'id': row.id,
+            'title': row.title,
+            'start_time': row.start_time.isoformat(),
+            'end_time': row.end_time.isoformat(),
+            'event_id': row.event_id,
+            'event_name': row.event_name
+        }) for row in rows)
+        yield (', ' if total else '') + chunk
+        total += len(rows)
+    # Do not keep a transaction open after the response
+    db.session.rollback()
+    yield f'], "total": {total}}}'
+
+"""
+Function: start_job
+Purpose: Queues a background job and answers the request that started it.
+Parameters:
+    - kind: Kind of job, a key of flaskr.jobs.JOB_STEPS.
+    - params: JSON parameters of the job.
+    - total: Number of items the job processes, for its progress.
+Returns: 202 Accepted with the job, and its URL in the Location header.
+"""
+
+def start_job(kind, params, total):
+    job = Job(kind=kind, params=params, total=total)
+    job.insert()
+    runner.start(current_app._get_current_object())
+    runner.submit(job.id)
+    response = jsonify({"success": True, "job": job.format()})
+    response.headers['Location'] = f'/jobs/{job.id}'
+    return response, 202
 
 """
 Function: create_app
@@ -48,6 +252,7 @@ def create_app(test_config=None):
     Response: JSON object with success status and a welcome message.
     """
     @app.route('/')
+    @rate_limited('welcome')
     def welcome():
         try:
             return jsonify({
@@ -61,29 +266,177 @@ def create_app(test_config=None):
     Get Events
     Path: /events
     Method: GET
-    Description: Fetches a list of all events in the database.
+    Description: Fetches a list of all events in the database, with their
+                 attendee and schedule counts. The optional
+                 'from' (inclusive) and 'to' (exclusive) ISO 8601 query
+                 parameters restrict the list to a date range using the
+                 index on events.date. With 'ids' (comma separated) the
+                 details of those events are returned instead, in request
+                 order; 'include' can add their schedules and attendees.
+                 Without filters the list, or one 'page' of it, is served
+                 from this worker's event snapshot, ordered by id.
     Response: JSON object containing a list of events.
     """
     @app.route('/events', methods=['GET'])
     @requires_auth('read:events')
     def get_events(payload):
+        if 'ids' in request.args:
+            try:
+                ids = [int(i) for i in request.args['ids'].split(',') if i.strip()]
+            except ValueError:
+                abort(400, "'ids' must be a comma separated list of event ids")
+            include = [i for i in request.args.get('include', '').split(',') if i]
+            return get_events_batch(ids, include)
+
+        start = parse_date_arg('from')
+        end = parse_date_arg('to')
+        if start is None and end is None:
+            page = parse_page_arg(default=None)
+            try:
+                return Response(event_snapshot.body(page), mimetype='application/json')
+            except Exception as e:
+                abort(500, str(e))
         try:
-            events = Event.query.all()
-            data = [{'id': e.id, 'name': e.name, 'date': e.date.isoformat()} for e in events]
+            query = Event.query
+            if start is not None:
+                query = query.filter(Event.date >= start)
+            if end is not None:
+                query = query.filter(Event.date < end)
+            events = query.order_by(Event.date).all()
+            data = [e.summary() for e in events]
             return jsonify({"success": True, "events": data}), 200
         except Exception as e:
             abort(500, str(e))
 
+    """
+    Get Upcoming Events
+    Path: /events/upcoming
+    Method: GET
+    Description: Fetches the events taking place from now on, ordered by date.
+                 The optional 'days' query parameter limits the window
+                 (e.g. days=7 for "what's on this week").
+    Response: JSON object containing a list of events.
+    """
+    @app.route('/events/upcoming', methods=['GET'])
+    @requires_auth('read:events')
+    def get_upcoming_events(payload):
+        days = request.args.get('days', type=int)
+        if days is not None and not 0 <= days <= MAX_UPCOMING_DAYS:
+            abort(400, f"'days' must be a number between 0 and {MAX_UPCOMING_DAYS}")
+        try:
+            now = datetime.now()
+            query = Event.query.filter(Event.date >= now)
+            if days is not None:
+                query = query.filter(Event.date < now + timedelta(days=days))
+            events = query.order_by(Event.date).all()
+            data = [e.summary() for e in events]
+            return jsonify({"success": True, "events": data}), 200
+        except Exception as e:
+            abort(500, str(e))
+
+    """
+    Get Event Calendar
+    Path: /events/calendar
+    Method: GET
+    Description: Returns the number of events per day between the optional
+                 'from' (inclusive) and 'to' (exclusive) dates, computed with a
+                 single aggregate query. With level=schedules the schedules
+                 are bucketed by their start time instead.
+    Response: JSON object containing a list of {date, count} entries.
+    """
+    @app.route('/events/calendar', methods=['GET'])
+    @requires_auth('read:events')
+    def get_event_calendar(payload):
+        start = parse_date_arg('from')
+        end = parse_date_arg('to')
+        level = request.args.get('level', 'events')
+        if level == 'events':
+            model, column = Event, Event.date
+        elif level == 'schedules':
+            model, column = Schedule, Schedule.start_time
+        else:
+            abort(400, f"Invalid level: {level}")
+        try:
+            day = func.date(column)
+            query = db.session.query(day, func.count()).select_from(model)
+            if start is not None:
+                query = query.filter(column >= start)
+            if end is not None:
+                query = query.filter(column < end)
+            rows = query.group_by(day).order_by(day).all()
+            # SQLite returns the day as a string, Postgres as a date
+            days = [{'date': d if isinstance(d, str) else d.isoformat(), 'count': count}
+                    for d, count in rows]
+            return jsonify({"success": True, "level": level, "days": days}), 200
+        except Exception as e:
+            abort(500, str(e))
+
+    """
+    Get Events Batch
+    Path: /events/batch
+    Method: POST
+    Description: Multi-get of events for id sets too large for a query string.
+                 Takes {"ids": [...], "include": ["schedules", "attendees"]}.
+    Response: JSON object containing the events in request order, with a
+              {"id": ..., "error": 404} marker for each missing id.
+    """
+    @app.route('/events/batch', methods=['POST'])
+    @requires_auth('read:events')
+    def post_events_batch(payload):
+        data = request.get_json()
+        if not isinstance(data, dict):
+            abort(400, "Expected a JSON object")
+        include = data.get('include', [])
+        if not isinstance(include, list):
+            abort(400, "'include' must be a list")
+        return get_events_batch(data.get('ids'), include)
+
+    """
+    Search Events
+    Path: /events/search
+    Method: GET
+    Description: Full-text search over event names and descriptions using the
+                 'q' query parameter. Results are ranked by relevance and
+                 paginated with the 'page' query parameter.
+    Response: JSON object containing the matching events and the total count.
+    """
+    @app.route('/events/search', methods=['GET'])
+    @requires_auth('read:events')
+    def search_events(payload):
+        terms = request.args.get('q', '').strip()
+        if not terms:
+            abort(400, "Missing search query 'q'")
+        page = parse_page_arg()
+        try:
+            rows, total = Event.search(terms, page=page, per_page=EVENTS_PER_PAGE)
+            data = [{'id': r.id, 'name': r.name, 'description': r.description,
+                     'date': r.date.isoformat(), 'rank': r.rank} for r in rows]
+            return jsonify({
+                "success": True,
+                "events": data,
+                "total": total,
+                "page": page
+            }), 200
+        except Exception as e:
+            abort(500, str(e))
+
     """
     Get Event Details
     Path: /events/<event_id>
     Method: GET
-    Description: Fetches the details of a specific event by its ID.
+    Description: Fetches the details of a specific event by its ID. With
+                 archived=true the event is read from the archive tables.
     Response: JSON object containing the event details, attendees, and schedules.
     """
     @app.route('/events/<int:event_id>', methods=['GET'])
     @requires_auth('read:events')
     def get_event(payload, event_id):
+        if request.args.get('archived') == 'true':
+            event = load_archived_event(event_id)
+            if not event:
+                abort(404, "Archived event not found")
+            return jsonify({"success": True, "event": event}), 200
+
         event = Event.query.get(event_id)
         if not event:
             abort(404, "Event not found")
@@ -98,6 +451,9 @@ def create_app(test_config=None):
                     "name": event.name,
                     "description": event.description,
                     "date": event.date.isoformat(),
+                    "capacity": event.capacity,
+                    "attendee_count": event.attendee_count,
+                    "schedule_count": event.schedule_count,
                     "attendees": attendees,
                     "schedules": schedules
                 }
@@ -105,6 +461,91 @@ def create_app(test_config=None):
         except Exception as e:
             abort(500, str(e))
 
+    """
+    Stream Event Changes
+    Path: /events/<event_id>/stream
+    Method: GET
+    Description: Server-Sent Events stream of the changes to a specific event,
+                 its schedules and attendees. Sends a heartbeat comment every
+                 15 seconds while idle. A reconnecting client's Last-Event-ID
+                 header resumes the stream from the change log.
+    Response: text/event-stream of change messages.
+    """
+    @app.route('/events/<int:event_id>/stream', methods=['GET'])
+    @requires_auth('read:events')
+    def stream_event(payload, event_id):
+        event = Event.query.get(event_id)
+        if not event:
+            abort(404, "Event not found")
+        last_id = request.headers.get('Last-Event-ID', type=int)
+        if last_id is None:
+            last_id = Change.latest_id(event_id)
+        db.session.rollback()
+        broker.start()
+        return Response(
+            stream_with_context(event_stream(event_id, last_id)),
+            mimetype='text/event-stream',
+            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+        )
+
+    """
+    Get Day Schedule
+    Path: /schedule
+    Method: GET
+    Description: Timeline of the schedules of all events in progress on the
+                 day given by the 'date' query parameter (YYYY-MM-DD),
+                 including sessions running past midnight, optionally only
+                 of the events of 'organizer_id', ordered by start time.
+                 Includes the number of schedules in progress during each
+                 hour of the day, counted in SQL. The schedules come from one
+                 overlap query on the schedule time range index and are
+                 streamed.
+    Response: JSON object containing the occupancy, schedules and total.
+    """
+    @app.route('/schedule', methods=['GET'])
+    @requires_auth('read:events')
+    def get_day_schedule(payload):
+        value = request.args.get('date')
+        if value is None:
+            abort(400, "Missing 'date'")
+        try:
+            day = date.fromisoformat(value)
+        except ValueError:
+            abort(400, f"Invalid 'date': {value}")
+        organizer_id = request.args.get('organizer_id')
+        if organizer_id is not None:
+            try:
+                organizer_id = int(organizer_id)
+            except ValueError:
+                abort(400, f"Invalid 'organizer_id': {organizer_id}")
+            if not 0 < organizer_id <= MAX_ID:
+                abort(400, f"'organizer_id' must be between 1 and {MAX_ID}")
+        try:
+            occupancy = Schedule.hourly_occupancy(day, organizer_id)
+        except Exception as e:
+            abort(500, str(e))
+        return Response(stream_with_context(day_schedule_stream(day, organizer_id, occupancy)),
+                        mimetype='application/json')
+
+    """
+    Get Event Calendar Feed
+    Path: /events/<event_id>/calendar.ics
+    Method: GET
+    Description: iCalendar feed of the schedule of a specific event, for
+                 calendar apps to subscribe to. Each schedule entry is a
+                 VEVENT. The rendered feed is cached until the event or its
+                 schedule changes, and requests with a matching
+                 If-None-Match header get 304 Not Modified.
+    Response: text/calendar feed.
+    """
+    @app.route('/events/<int:event_id>/calendar.ics', methods=['GET'])
+    @requires_auth('read:events')
+    def get_event_calendar_feed(payload, event_id):
+        event = Event.query.get(event_id)
+        if not event:
+            abort(404, "Event not found")
+        return calendar_response(event.name, Change.feed_versions([event_id]))
+
     """
     Create Event
     Path: /events
@@ -114,6 +555,7 @@ def create_app(test_config=None):
     """
     @app.route('/events', methods=['POST'])
     @requires_auth('create:events')
+    @idempotent
     def create_event(payload):
         data = request.get_json()
         try:
@@ -121,7 +563,8 @@ def create_app(test_config=None):
                 name=data['name'],
                 description=data.get('description', None),
                 date=datetime.fromisoformat(data['date']),
-                organizer_id=data['organizer_id']
+                organizer_id=data['organizer_id'],
+                capacity=parse_capacity(data.get('capacity'))
             )
             new_event.insert()
             return jsonify({"success": True, "event": new_event.format()}), 201
@@ -132,12 +575,18 @@ def create_app(test_config=None):
     Add Attendee
     Path: /events/<event_id>/attendees
     Method: POST
-    Description: Adds an attendee to a specific event by event ID.
-    Response: JSON object containing the newly added attendee's details.
+    Description: Registers an attendee for a specific event by event ID. A seat
+                 is reserved atomically; when the event is full the request
+                 fails with 409, unless "waitlist": true is sent, in which
+                 case the attendee joins the event's waitlist (202). The
+                 attendee is upserted by email, and registering an attendee
+                 again returns 200 without taking another seat.
+    Response: JSON object containing the attendee's details.
     """
 
     @app.route('/events/<int:event_id>/attendees', methods=['POST'])
     @requires_auth('manage:attendees')
+    @idempotent
     def add_attendee(payload, event_id):
         
         data = request.get_json()
@@ -148,19 +597,87 @@ def create_app(test_config=None):
          # Raise 404 if the event is not found
             abort(404, description="Event not found")
         try:
-            # Create a new attendee
-            new_attendee = Attendee(name=data['name'], email=data['email'])
-            new_attendee.insert()
-            # Return success response
-            return jsonify({"success": True, "attendee": new_attendee.format()}), 201
-
+            # Upsert the attendee by email and reserve a seat
+            status, attendee_id = event.register(data['name'], data['email'], waitlist=bool(data.get('waitlist', False)))
         except KeyError as e:
             # Handle missing keys in request payload
             abort(400, description=f"Missing key: {str(e)}")
         except Exception as e:
             # Handle all other exceptions
+            db.session.rollback()
             abort(500, description=f"An unexpected error occurred: {str(e)}")
 
+        if status == 'full':
+            abort(409, description="Event is full")
+        attendee = Attendee.query.get(attendee_id)
+        if status == 'waitlisted':
+            entry = WaitlistEntry.query.filter_by(event_id=event_id, attendee_id=attendee_id).first()
+            return jsonify({
+                "success": True,
+                "attendee": attendee.format(),
+                "waitlist": entry.format()
+            }), 202
+        # Return success response; repeated registrations are not an error
+        return jsonify({"success": True, "attendee": attendee.format()}), 201 if status == 'registered' else 200
+
+    """
+    Import Attendees
+    Path: /events/<event_id>/attendees/import
+    Method: POST
+    Description: Registers a list of attendees for a specific event in a
+                 background job, creating the attendees whose email address
+                 is new. Attendees past the event's capacity are waitlisted
+                 when "waitlist": true is sent, and counted as full otherwise.
+    Response: 202 with the job; its progress is read from GET /jobs/<job_id>.
+    """
+    @app.route('/events/<int:event_id>/attendees/import', methods=['POST'])
+    @requires_auth('manage:attendees')
+    @idempotent
+    def import_attendees(payload, event_id):
+        data = request.get_json()
+        event = Event.query.get(event_id)
+        if not event:
+            abort(404, "Event not found")
+        people = data.get('attendees') if isinstance(data, dict) else None
+        if not isinstance(people, list) or not people:
+            abort(400, "'attendees' must be a non-empty list")
+        if len(people) > MAX_IMPORT_ATTENDEES:
+            abort(400, f"At most {MAX_IMPORT_ATTENDEES} attendees can be imported at once")
+        try:
+            people = [{'name': str(p['name']), 'email': str(p['email'])} for p in people]
+        except (KeyError, TypeError) as e:
+            abort(400, f"Each attendee needs a name and an email: {e}")
+        params = {'event_id': event_id, 'attendees': people, 'waitlist': bool(data.get('waitlist', False))}
+        return start_job('import_attendees', params, len(people))
+
+    """
+    Remove Attendee
+    Path: /events/<event_id>/attendees/<attendee_id>
+    Method: DELETE
+    Description: Unregisters an attendee from a specific event (or removes
+                 them from its waitlist). The freed seat goes to the first
+                 attendee on the waitlist.
+    Response: JSON object confirming the removal and any promoted attendee.
+    """
+    @app.route('/events/<int:event_id>/attendees/<int:attendee_id>', methods=['DELETE'])
+    @requires_auth('manage:attendees')
+    def remove_attendee(payload, event_id, attendee_id):
+        event = Event.query.get(event_id)
+        if not event:
+            abort(404, "Event not found")
+        try:
+            removed, promoted = event.unregister(attendee_id)
+        except Exception as e:
+            db.session.rollback()
+            abort(500, str(e))
+        if not removed:
+            abort(404, "Attendee not registered for this event")
+        return jsonify({
+            "success": True,
+            "removed": attendee_id,
+            "promoted": promoted
+        }), 200
+
     """
     Add Schedule
     Path: /events/<event_id>/schedule
@@ -170,6 +687,7 @@ def create_app(test_config=None):
     """
     @app.route('/events/<int:event_id>/schedule', methods=['POST'])
     @requires_auth('create:schedule')
+    @idempotent
     def add_schedule(payload, event_id):
         data = request.get_json()
         
@@ -183,18 +701,111 @@ def create_app(test_config=None):
                 end_time=datetime.fromisoformat(data['end_time']),
                 event_id=event_id
             )
+        except Exception as e:
+            abort(400, str(e))
+
+        check_schedule_slot(event_id, new_schedule.start_time, new_schedule.end_time)
+        try:
             new_schedule.insert()
 
             return jsonify({"success": True, "schedule": new_schedule.format()}), 201
+        except IntegrityError:
+            # Lost a race against a concurrent overlapping insert
+            db.session.rollback()
+            abort(409, "Schedule overlaps with an existing schedule")
+        except Exception as e:
+            abort(400, str(e))
+
+    """
+    Update Schedule
+    Path: /events/<event_id>/schedule/<schedule_id>
+    Method: PATCH
+    Description: Updates the title or time slot of a schedule. The new time
+                 slot is checked against the other schedules of the event.
+    Response: JSON object containing the updated schedule's details.
+    """
+    @app.route('/events/<int:event_id>/schedule/<int:schedule_id>', methods=['PATCH'])
+    @requires_auth('create:schedule')
+    def update_schedule(payload, event_id, schedule_id):
+        data = request.get_json()
+
+        schedule = Schedule.query.filter_by(id=schedule_id, event_id=event_id).first()
+        if not schedule:
+            abort(404, "Schedule not found")
+        try:
+            start_time = datetime.fromisoformat(data['start_time']) if 'start_time' in data else schedule.start_time
+            end_time = datetime.fromisoformat(data['end_time']) if 'end_time' in data else schedule.end_time
+        except Exception as e:
+            abort(400, str(e))
+
+        check_schedule_slot(event_id, start_time, end_time, exclude_id=schedule_id)
+        try:
+            if 'title' in data:
+                schedule.title = data['title']
+            schedule.start_time = start_time
+            schedule.end_time = end_time
+            schedule.update()
+
+            return jsonify({"success": True, "schedule": schedule.format()}), 200
+        except IntegrityError:
+            db.session.rollback()
+            abort(409, "Schedule overlaps with an existing schedule")
         except Exception as e:
             abort(400, str(e))
 
+    """
+    Delete Schedule
+    Path: /events/<event_id>/schedule/<schedule_id>
+    Method: DELETE
+    Description: Deletes a schedule of a specific event.
+    Response: JSON object confirming the deletion of the schedule.
+    """
+    @app.route('/events/<int:event_id>/schedule/<int:schedule_id>', methods=['DELETE'])
+    @requires_auth('create:schedule')
+    def delete_schedule(payload, event_id, schedule_id):
+        schedule = Schedule.query.filter_by(id=schedule_id, event_id=event_id).first()
+        if not schedule:
+            abort(404, "Schedule not found")
+        try:
+            schedule.delete()
+            return jsonify({"success": True, "deleted": schedule_id}), 200
+        except Exception as e:
+            abort(400, str(e))
+
+    """
+    Get Schedule Conflicts
+    Path: /events/<event_id>/schedule/conflicts
+    Method: GET
+    Description: Reports every pair of overlapping schedules of an event,
+                 found with a single sorted sweep over its schedules.
+    Response: JSON object containing the list of conflicting schedule pairs.
+    """
+    @app.route('/events/<int:event_id>/schedule/conflicts', methods=['GET'])
+    @requires_auth('read:events')
+    def get_schedule_conflicts(payload, event_id):
+        event = Event.query.get(event_id)
+        if not event:
+            abort(404, "Event not found")
+        try:
+            conflicts = [{
+                'schedules': [first.id, second.id],
+                'overlap_start': second.start_time.isoformat(),
+                'overlap_end': min(first.end_time, second.end_time).isoformat()
+            } for first, second in Schedule.overlapping_pairs(event_id)]
+            return jsonify({"success": True, "conflicts": conflicts}), 200
+        except Exception as e:
+            abort(500, str(e))
+
     """
     Update Event
     Path: /events/<event_id>
     Method: PATCH
-    Description: Updates the details of a specific event by event ID.
-    Response: JSON object containing the updated event's details.
+    Description: Updates the details of a specific event by event ID. Seats
+                 added by a higher capacity go to the first attendees on the
+                 waitlist; a capacity below the number of registered
+                 attendees is rejected with 409.
+    Response: JSON object containing the updated event's details and the
+              promoted attendee ids.
     """
     @app.route('/events/<int:event_id>', methods=['PATCH'])
     @requires_auth('update:events')
@@ -210,18 +821,30 @@ def create_app(test_config=None):
                 event.description = data['description']
             if 'date' in data:
                 event.date = datetime.fromisoformat(data['date'])
+            promoted = []
+            if 'capacity' in data:
+                promoted = event.set_capacity(parse_capacity(data['capacity']))
 
-            event.update()
-            return jsonify({"success": True, "event": event.format()}), 200
+            if promoted is not None:
+                event.update()
         except Exception as e:
+            db.session.rollback()
             abort(400, str(e))
+        if promoted is None:
+            db.session.rollback()
+            abort(409, "Capacity is below the number of registered attendees")
+        return jsonify({"success": True, "event": event.format(), "promoted": promoted}), 200
 
     """
     Delete Event
     Path: /events/<event_id>
     Method: DELETE
-    Description: Deletes a specific event by event ID.
-    Response: JSON object confirming the deletion of the event.
+    Description: Deletes a specific event by event ID, with its schedules,
+                 attendance links and waitlist. Events with more than
+                 DELETE_SYNC_LIMIT attendees and schedules are deleted by a
+                 background job instead.
+    Response: JSON object confirming the deletion of the event, or 202 with
+              the deletion job.
     """
     @app.route('/events/<int:event_id>', methods=['DELETE'])
     @requires_auth('delete:events')
@@ -229,12 +852,176 @@ def create_app(test_config=None):
         event = Event.query.get(event_id)
         if not event:
             abort(404, "Event not found")
+        dependents = event.attendee_count + event.schedule_count
+        if dependents > DELETE_SYNC_LIMIT:
+            waitlisted = WaitlistEntry.query.filter_by(event_id=event_id).count()
+            return start_job('delete_event', {'event_id': event_id}, dependents + waitlisted)
         try:
             event.delete()
             return jsonify({"success": True, "deleted": event_id}), 200
         except Exception as e:
             abort(400, str(e))
 
+    """
+    Get Attendees
+    Path: /attendees
+    Method: GET
+    Description: Lists attendees by ID, paginated with the 'page' query
+                 parameter. With 'email' only the attendee with that email
+                 address is returned, using the unique index on
+                 attendees.email.
+    Response: JSON object containing the attendees and the total count.
+    """
+    @app.route('/attendees', methods=['GET'])
+    @requires_auth('manage:attendees')
+    def get_attendees(payload):
+        page = parse_page_arg()
+        try:
+            query = Attendee.query
+            email = request.args.get('email')
+            if email is not None:
+                query = query.filter(Attendee.email == email)
+            attendees = query.order_by(Attendee.id).paginate(page=page, per_page=ATTENDEES_PER_PAGE, error_out=False)
+            return jsonify({
+                "success": True,
+                "attendees": [a.format() for a in attendees.items],
+                "total": attendees.total,
+                "page": page
+            }), 200
+        except Exception as e:
+            abort(500, str(e))
+
+    """
+    Get Attendee Events
+    Path: /attendees/<attendee_id>/events
+    Method: GET
+    Description: Lists the events an attendee is registered for, ordered by
+                 date and paginated with the 'page' query parameter.
+    Response: JSON object containing the events and the total count.
+    """
+    @app.route('/attendees/<int:attendee_id>/events', methods=['GET'])
+    @requires_auth('read:events')
+    def get_attendee_events(payload, attendee_id):
+        page = parse_page_arg()
+        attendee = Attendee.query.get(attendee_id)
+        if not attendee:
+            abort(404, "Attendee not found")
+        try:
+            events = Event.for_attendee(attendee_id).paginate(page=page, per_page=EVENTS_PER_PAGE, error_out=False)
+            return jsonify({
+                "success": True,
+                "attendee_id": attendee_id,
+                "events": [e.summary() for e in events.items],
+                "total": events.total,
+                "page": page
+            }), 200
+        except Exception as e:
+            abort(500, str(e))
+
+    """
+    Get Attendee Calendar Feed
+    Path: /attendees/<attendee_id>/calendar.ics
+    Method: GET
+    Description: iCalendar feed of the schedules of all the events a specific
+                 attendee is registered for. Built from the same per-event
+                 cache as the event feeds; its ETag changes when the attendee
+                 registers or unregisters, or one of the events changes.
+    Response: text/calendar feed.
+    """
+    @app.route('/attendees/<int:attendee_id>/calendar.ics', methods=['GET'])
+    @requires_auth('read:events')
+    def get_attendee_calendar_feed(payload, attendee_id):
+        attendee = Attendee.query.get(attendee_id)
+        if not attendee:
+            abort(404, "Attendee not found")
+        return calendar_response(attendee.name, Change.feed_versions(attendee_event_ids(attendee_id)))
+
+    """
+    Get Job
+    Path: /jobs/<job_id>
+    Method: GET
+    Description: Status and progress of a background job. Also makes sure
+                 this worker runs its job pool, so pending jobs and jobs
+                 orphaned by a restarted worker resume.
+    Response: JSON object containing the job.
+    """
+    @app.route('/jobs/<int:job_id>', methods=['GET'])
+    @requires_auth('read:events')
+    def get_job(payload, job_id):
+        job = Job.query.get(job_id)
+        if not job:
+            abort(404, "Job not found")
+        runner.start(current_app._get_current_object())
+        return jsonify({"success": True, "job": job.format()}), 200
+
+    """
+    Get Organizer Stats
+    Path: /organizers/<organizer_id>/stats
+    Method: GET
+    Description: Dashboard figures of an organizer: events, schedules and
+                 registrations per month from the organizer_stats rollup,
+                 and registrations and schedules per event from the events'
+                 denormalized counters. Never reads attendances or schedules.
+    Response: JSON object containing the monthly and per-event figures.
+    """
+    @app.route('/organizers/<int:organizer_id>/stats', methods=['GET'])
+    @requires_auth('read:events')
+    def get_organizer_stats(payload, organizer_id):
+        try:
+            months = (OrganizerStats.query
+                      .filter(OrganizerStats.organizer_id == organizer_id, OrganizerStats.event_count > 0)
+                      .order_by(OrganizerStats.month)
+                      .all())
+            events = (db.session.query(Event.id, Event.name, Event.date, Event.attendee_count, Event.schedule_count)
+                      .filter(Event.organizer_id == organizer_id)
+                      .order_by(Event.date)
+                      .all())
+            return jsonify({
+                "success": True,
+                "organizer_id": organizer_id,
+                "months": [m.format() for m in months],
+                "events": [{'id': e.id, 'name': e.name, 'date': e.date.isoformat(),
+                            'registrations': e.attendee_count, 'schedules': e.schedule_count}
+                           for e in events]
+            }), 200
+        except Exception as e:
+            abort(500, str(e))
+
+    """
+    Get Changes
+    Path: /changes
+    Method: GET
+    Description: Returns the change log of events, schedules and attendance
+                 links after the 'since' cursor (default 0), oldest first.
+                 Deleted events and schedules appear as tombstones with null
+                 data. Clients pass back next_cursor to sync incrementally;
+                 'limit' caps the page size (default 100, at most 1000).
+    Response: JSON object containing the changes and the next cursor.
+    """
+    @app.route('/changes', methods=['GET'])
+    @requires_auth('read:events')
+    def get_changes(payload):
+        since = request.args.get('since', 0, type=int)
+        limit = request.args.get('limit', CHANGES_PER_PAGE, type=int)
+        if since < 0 or limit < 1:
+            abort(400, "'since' and 'limit' must be positive numbers")
+        if since > MAX_ID:
+            abort(400, f"'since' must be at most {MAX_ID}")
+        limit = min(limit, MAX_CHANGES_PER_PAGE)
+        try:
+            # Fetch one extra row to tell whether another page follows
+            changes = Change.since(since, limit + 1)
+            has_more = len(changes) > limit
+            changes = changes[:limit]
+            return jsonify({
+                "success": True,
+                "changes": [c.format() for c in changes],
+                "next_cursor": changes[-1].id if changes else since,
+                "has_more": has_more
+            }), 200
+        except Exception as e:
+            abort(500, str(e))
+
     """
     Error Handlers
     400 - Bad Request: Triggered when the request is invalid or missing required data.
@@ -243,6 +1030,12 @@ def create_app(test_config=None):
     404 - Not Found: Triggered when a resource (Event, Schedule, or Attendees) is not found in the database.
     Response: JSON object with an error code (404) and a description of the issue.
 
+    409 - Conflict: Triggered when a request clashes with existing data, e.g. overlapping schedules.
+    Response: JSON object with an error code (409) and a description of the issue.
+
+    422 - Unprocessable Entity: Triggered when an Idempotency-Key is reused with a different request body.
+    Response: JSON object with an error code (422) and a description of the issue.
+
     500 - Internal Server Error: Triggered for unexpected errors in the application.
     Response: JSON object with an error code (500) and a message describing the issue.
 
@@ -265,6 +1058,22 @@ def create_app(test_config=None):
             "message": str(error.description)
         }), 404
 
+    @app.errorhandler(409)
+    def conflict(error):
+        return jsonify({
+            "success": False,
+            "error": 409,
+            "message": str(error.description)
+        }), 409
+
+    @app.errorhandler(422)
+    def unprocessable(error):
+        return jsonify({
+            "success": False,
+            "error": 422,
+            "message": str(error.description)
+        }), 422
+
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({
@@ -275,15 +1084,19 @@ def create_app(test_config=None):
 
     @app.errorhandler(AuthError)
     def auth_error(error):
-        return jsonify({
+        response = jsonify({
             "success": False,
             "error": error.status_code,
             "message": error.error['description']
-        }), error.status_code
+        })
+        if isinstance(error, RateLimitError):
+            response.headers['Retry-After'] = str(error.retry_after)
+        return response, error.status_code
 
     return app
 
 APP = create_app()
 
 if __name__ == '__main__':
+    runner.start(APP)
     APP.run(host='0.0.0.0', port=8080, debug=True)
@@ -0,0 +1,151 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from models import db, Event, attendances
+
+PRODID = '-//Event Management API//Event Schedules//EN'
+UID_DOMAIN = 'event-management-api'
+FEED_CACHE_SIZE = 1024
+
+# FeedCache
+# Keeps the rendered VEVENTs of recently requested events in this worker
+# process.
+
+class FeedCache:
+    """
+    Per-worker LRU cache of the rendered VEVENT block of each event.
+
+    Entries are keyed by event id and tagged with the event's feed version,
+    the id of its latest event or schedule change in the change log. Any
+    schedule insert, update or delete, in any worker, logs a change and so
+    makes the cached block stale; there is nothing to invalidate explicitly.
+    """
+    def __init__(self, size=FEED_CACHE_SIZE):
+        self.lock = threading.Lock()
+        self.size = size
+        self.blocks = OrderedDict()
+
+    def get(self, event_id, version):
+        with self.lock:
+            entry = self.blocks.get(event_id)
+            if entry is None or entry[0] != version:
+                return None
+            self.blocks.move_to_end(event_id)
+            return entry[1]
+
+    def put(self, event_id, version, block):
+        with self.lock:
+            current = self.blocks.get(event_id)
+            # A slower request may finish rendering an older version last
+            if current is not None and current[0] > version:
+                return
+            self.blocks[event_id] = (version, block)
+            self.blocks.move_to_end(event_id)
+            while len(self.blocks) > self.size:
+                self.blocks.popitem(last=False)
+
+
+feed_cache = FeedCache()
+
+
+def escape_text(value):
+    return (value.replace('\\', '\\\\')
+                 .replace(';', '\\;')
+                 .replace(',', '\\,')
+                 .replace('\r\n', '\\n')
+                 .replace('\n', '\\n'))
+
+
+def fold(line):
+    # Content lines are limited to 75 octets; longer lines continue on the
+    # next line after a single space, without splitting a UTF-8 sequence
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return encoded + b'\r\n'
+    parts = []
+    start, limit = 0, 75
+    while len(encoded) - start > limit:
+        end = start + limit
+        while encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end])
+        start, limit = end, 74
+    parts.append(encoded[start:])
+    return b'\r\n '.join(parts) + b'\r\n'
+
+
+def format_datetime(value):
+    # Event and schedule times are stored without a time zone, so they are
+    # published as floating times
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def render_event(event, stamp):
+    lines = []
+    description = event['description'] or ''
+    for schedule in event['schedules']:
+        lines += [
+            'BEGIN:VEVENT',
+            f"UID:schedule-{schedule['id']}@{UID_DOMAIN}",
+            f'DTSTAMP:{stamp}',
+            f"DTSTART:{format_datetime(datetime.fromisoformat(schedule['start_time']))}",
+            f"DTEND:{format_datetime(datetime.fromisoformat(schedule['end_time']))}",
+            f"SUMMARY:{escape_text(schedule['title'])}",
+            f"DESCRIPTION:{escape_text(event['name'] + (': ' + description if description else ''))}",
+            'END:VEVENT',
+        ]
+    return b''.join(fold(line) for line in lines)
+
+
+def feed_etag(versions):
+    """Entity tag of a feed made of the given events at the given versions."""
+    key = ','.join(f'{event_id}.{version}' for event_id, version in versions.items())
+    return hashlib.sha1(key.encode('ascii')).hexdigest()
+
+
+def attendee_event_ids(attendee_id):
+    rows = (db.session.query(attendances.c.event_id)
+            .filter(attendances.c.attendee_id == attendee_id)
+            .order_by(attendances.c.event_id))
+    return [event_id for (event_id,) in rows]
+
+
+"""
+Function: calendar_feed
+Purpose: Generates an iCalendar feed of the schedules of some events.
+Parameters:
+    - name: Calendar name shown by calendar apps.
+    - versions: Feed version of each event, from Change.feed_versions, read
+                before the schedules so a cached block is never newer than
+                its version.
+Yields: The feed in chunks, one per event. Blocks of unchanged events come
+        from the cache; the others are rendered with one batched query and
+        cached.
+"""
+
+def calendar_feed(name, versions):
+    yield b''.join(fold(line) for line in [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(name)}',
+    ])
+    blocks = {event_id: feed_cache.get(event_id, version) for event_id, version in versions.items()}
+    missing = [event_id for event_id, block in blocks.items() if block is None]
+    if missing:
+        stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+        events = Event.load_many(missing, schedules=True)
+        # Do not keep a transaction open while streaming
+        db.session.rollback()
+        for event_id in missing:
+            # Events deleted since the versions were read render as empty
+            block = render_event(events[event_id], stamp) if event_id in events else b''
+            feed_cache.put(event_id, versions[event_id], block)
+            blocks[event_id] = block
+    for block in blocks.values():
+        if block:
+            yield block
+    yield fold('END:VCALENDAR')
@@ -0,0 +1,82 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import Response, abort, make_response, request
+from models import db, IdempotencyKey
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+# A request still in progress after this long is considered abandoned
+IDEMPOTENCY_LOCK_SECONDS = 60
+# Keys are kept this long; see 'flask --app manage purge-idempotency-keys'
+IDEMPOTENCY_TTL_HOURS = 24
+
+
+def idempotency_digest(payload, key):
+    scope = f"{payload.get('sub')}\n{request.method} {request.path}\n{key}"
+    return hashlib.sha256(scope.encode('utf-8')).hexdigest()
+
+
+def check_same_request(stored, request_hash):
+    # Keys stored before request hashes were recorded have none
+    if stored.request_hash not in (None, request_hash):
+        abort(422, f"This {IDEMPOTENCY_HEADER} was already used with a different request body")
+
+
+def replay(stored, request_hash):
+    check_same_request(stored, request_hash)
+    response = Response(stored.body, status=stored.status_code, mimetype='application/json')
+    if stored.location:
+        response.headers['Location'] = stored.location
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+
+"""
+Function: idempotent
+Purpose: Decorator honoring the Idempotency-Key header of POST routes,
+         applied below requires_auth.
+Behavior:
+    - Without the header the route runs as usual.
+    - A key already used by the same caller on the same path replays the
+      stored response with a single primary key lookup.
+    - Otherwise the key is reserved along with a hash of the request body,
+      the route runs, and a successful response is stored. Error responses
+      release the key, so the client can retry them.
+Raises:
+    - 409 Conflict while another request with the same key is running.
+    - 422 Unprocessable Entity when the key was used with a different body.
+"""
+
+def idempotent(f):
+    @wraps(f)
+    def wrapper(payload, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return f(payload, *args, **kwargs)
+        digest = idempotency_digest(payload, key)
+        request_hash = hashlib.sha256(request.get_data()).hexdigest()
+        stored = IdempotencyKey.query.get(digest)
+        if stored is not None and stored.status_code is not None:
+            return replay(stored, request_hash)
+        db.session.rollback()
+
+        stale_before = datetime.utcnow() - timedelta(seconds=IDEMPOTENCY_LOCK_SECONDS)
+        if not IdempotencyKey.acquire(digest, request_hash, stale_before):
+            stored = IdempotencyKey.query.get(digest)
+            if stored is not None:
+                if stored.status_code is not None:
+                    return replay(stored, request_hash)
+                check_same_request(stored, request_hash)
+            abort(409, f"A request with this {IDEMPOTENCY_HEADER} is in progress")
+        try:
+            response = make_response(f(payload, *args, **kwargs))
+        except Exception:
+            IdempotencyKey.release(digest)
+            raise
+        if response.status_code < 300:
+            IdempotencyKey.complete(digest, response.status_code, response.get_data(as_text=True),
+                                    response.headers.get('Location'))
+        else:
+            IdempotencyKey.release(digest)
+        return response
+    return wrapper
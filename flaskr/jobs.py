@@ -0,0 +1,140 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from models import db, Event, Job
+
+logger = logging.getLogger(__name__)
+
+JOB_WORKERS = 2
+JOB_CHUNK_SIZE = 500
+# A running job not updated for this long is taken over by another worker
+JOB_STALE_SECONDS = 120
+JOB_SWEEP_SECONDS = 30
+
+
+def delete_event_step(job):
+    event_id = job.params['event_id']
+    deleted = Event.delete_dependents(event_id, JOB_CHUNK_SIZE)
+    job.progress += deleted
+    if deleted:
+        return False
+    event = Event.query.get(event_id)
+    if event:
+        db.session.expire(event, ['schedules', 'attendees'])
+        db.session.delete(event)
+    job.result = {'deleted': event_id}
+    return True
+
+
+def import_attendees_step(job):
+    people = job.params['attendees'][job.progress:job.progress + JOB_CHUNK_SIZE]
+    if people:
+        if not Event.query.get(job.params['event_id']):
+            raise LookupError('Event not found')
+        counts = Event.register_many(job.params['event_id'], people, job.params.get('waitlist', False))
+        job.result = {key: (job.result or {}).get(key, 0) + count for key, count in counts.items()}
+        job.progress += len(people)
+    return job.progress >= job.total
+
+
+# Each step does one chunk of a job and updates its progress, without
+# committing; it returns True once the job is complete.
+JOB_STEPS = {
+    'delete_event': delete_event_step,
+    'import_attendees': import_attendees_step,
+}
+
+
+"""
+Function: run_job
+Purpose: Runs a claimed job to completion, one committed chunk at a time.
+Parameters:
+    - job_id: ID of a job claimed with Job.claim.
+Returns: None. The job ends as 'succeeded', or as 'failed' with the error
+         of the chunk that failed; earlier chunks stay committed.
+"""
+
+def run_job(job_id):
+    try:
+        while True:
+            job = Job.query.get(job_id)
+            done = JOB_STEPS[job.kind](job)
+            job.updated_at = datetime.utcnow()
+            if done:
+                job.status = 'succeeded'
+            db.session.commit()
+            if done:
+                return
+    except Exception as e:
+        logger.exception('Job %s failed', job_id)
+        db.session.rollback()
+        job = Job.query.get(job_id)
+        job.status = 'failed'
+        job.error = str(e)
+        job.updated_at = datetime.utcnow()
+        db.session.commit()
+
+
+def stale_before():
+    return datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+
+
+# JobRunner
+# Runs the background jobs of this worker process.
+
+class JobRunner:
+    """
+    Per-worker thread pool running jobs from the jobs table.
+
+    Jobs are submitted right after they are created. A sweeper thread also
+    picks up pending jobs and jobs orphaned by a worker that stopped, so
+    jobs resume after a restart without an external broker. Every job is
+    claimed with a conditional UPDATE before it runs, so a job submitted by
+    several workers runs once.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.app = None
+        self.executor = None
+        self.queued = set()
+
+    def start(self, app):
+        """Starts the pool and the sweeper the first time a job is used."""
+        with self.lock:
+            if self.executor is not None:
+                return
+            self.app = app
+            self.executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix='job')
+            threading.Thread(target=self._sweep, daemon=True).start()
+
+    def submit(self, job_id):
+        with self.lock:
+            # The sweeper finds jobs still waiting in the pool's queue
+            if job_id in self.queued:
+                return
+            self.queued.add(job_id)
+        self.executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        try:
+            with self.app.app_context():
+                if Job.claim(job_id, stale_before()):
+                    run_job(job_id)
+        finally:
+            with self.lock:
+                self.queued.discard(job_id)
+
+    def _sweep(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    for job_id in Job.claimable(stale_before()):
+                        self.submit(job_id)
+            except Exception:
+                logger.exception('Job sweep failed')
+            time.sleep(JOB_SWEEP_SECONDS)
+
+
+runner = JobRunner()
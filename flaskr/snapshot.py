@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from sqlalchemy import select
+from models import db, Event, Change
+
+# Catching up with more changed events than this rebuilds the whole snapshot
+SNAPSHOT_MAX_CHANGED_EVENTS = 1000
+# Full rebuild interval, a safety net for writes that bypass the change log
+SNAPSHOT_REBUILD_SECONDS = 300
+
+SUMMARY_COLUMNS = (Event.id, Event.name, Event.date, Event.attendee_count, Event.schedule_count)
+
+
+class EventRecord:
+    """
+    An event of the snapshot, with its GET /events entry pre-encoded.
+    """
+    __slots__ = ('id', 'name', 'date', 'json')
+
+    def __init__(self, row):
+        self.id = row.id
+        self.name = row.name
+        self.date = row.date
+        self.json = json.dumps({
+            'attendee_count': row.attendee_count,
+            'date': row.date.isoformat(),
+            'id': row.id,
+            'name': row.name,
+            'schedule_count': row.schedule_count
+        }, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+# EventSnapshot
+# Serves the event list of GET /events from the memory of this worker process.
+
+class EventSnapshot:
+    """
+    Per-worker snapshot of the event list, ordered by id.
+
+    Records are kept in a dict keyed by id, with the ids in a compact sorted
+    array. The encoded response body of each page is cached until one of its
+    records changes. Every read checks the change log's head cursor; when
+    it has moved, only the events with new changes are reloaded, so a read
+    with no new writes is one primary key lookup and a copy of cached bytes.
+    """
+    def __init__(self, per_page):
+        self.lock = threading.Lock()
+        self.per_page = per_page
+        self.reset()
+
+    def reset(self):
+        self.records = {}
+        self.ids = array('q')
+        self.pages = {}
+        self.version = None
+        self.built_at = 0.0
+
+    def body(self, page=None):
+        """
+        Returns the encoded GET /events body of a page, or of the whole list
+        when page is None. Only pages up to the last one are cached; pages
+        past it are empty and encoded on every request.
+        """
+        with self.lock:
+            self._refresh()
+            body = self.pages.get(page)
+            if body is None:
+                body = self._encode(page)
+                if page is None or page <= self._last_page():
+                    self.pages[page] = body
+            return body
+
+    def _last_page(self):
+        return max(1, -(-len(self.ids) // self.per_page))
+
+    def _refresh(self):
+        version = Change.head()
+        if (self.version is None or version < self.version
+                or time.monotonic() - self.built_at > SNAPSHOT_REBUILD_SECONDS):
+            self._rebuild(version)
+        elif version > self.version:
+            event_ids = Change.changed_events(self.version, version, SNAPSHOT_MAX_CHANGED_EVENTS + 1)
+            if len(event_ids) > SNAPSHOT_MAX_CHANGED_EVENTS:
+                self._rebuild(version)
+                return
+            rows = {row.id: row for row in db.session.execute(
+                select(*SUMMARY_COLUMNS).where(Event.id.in_(event_ids)))}
+            for event_id in event_ids:
+                if event_id in rows:
+                    self._put(EventRecord(rows[event_id]))
+                else:
+                    self._remove(event_id)
+            self.version = version
+
+    def _rebuild(self, version):
+        # The version is read first, so the records are at least that recent
+        rows = db.session.execute(select(*SUMMARY_COLUMNS).order_by(Event.id))
+        self.records = {row.id: EventRecord(row) for row in rows}
+        self.ids = array('q', self.records)
+        self.pages = {}
+        self.version = version
+        self.built_at = time.monotonic()
+
+    def _put(self, record):
+        position = bisect_left(self.ids, record.id)
+        if record.id in self.records:
+            self.pages.pop(position // self.per_page + 1, None)
+            self.pages.pop(None, None)
+        else:
+            self.ids.insert(position, record.id)
+            # Every following page shifts
+            self.pages = {}
+        self.records[record.id] = record
+
+    def _remove(self, event_id):
+        if self.records.pop(event_id, None) is not None:
+            del self.ids[bisect_left(self.ids, event_id)]
+            self.pages = {}
+
+    def _encode(self, page):
+        if page is None:
+            events = b','.join(self.records[event_id].json for event_id in self.ids)
+            return b'{"events":[' + events + b'],"success":true}'
+        start = (page - 1) * self.per_page
+        events = b','.join(self.records[event_id].json for event_id in self.ids[start:start + self.per_page])
+        return b'{"events":[%s],"page":%d,"success":true,"total":%d}' % (events, page, len(self.ids))
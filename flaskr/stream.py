@@ -0,0 +1,156 @@
+import json
+import logging
+import queue
+import select
+import threading
+import time
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from models import db, Change
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = 'event_changes'
+HEARTBEAT_SECONDS = 15
+
+# ChangeBroker
+# Fans out "event changed" notifications to the Server-Sent Events streams of
+# this worker process.
+
+class ChangeBroker:
+    """
+    Per-worker publish/subscribe hub for event change notifications.
+
+    On Postgres a single background thread per worker LISTENs on the
+    event_changes channel (fed by a trigger on the changes table) and wakes
+    the subscribers of the notified event. On other databases, changes
+    committed by this process are published directly after commit.
+
+    Notifications only carry the event id; subscribers read the actual
+    changes from the change log, which also serves Last-Event-ID resumes.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = {}
+        self.listener = None
+        self.mode = None
+
+    def start(self):
+        """Starts the Postgres listener the first time a stream is opened."""
+        with self.lock:
+            if self.mode is not None:
+                return
+            engine = db.engine
+            if engine.dialect.name == 'postgresql':
+                self.mode = 'listen'
+                self.listener = threading.Thread(target=self._listen, args=(engine,), daemon=True)
+                self.listener.start()
+            else:
+                self.mode = 'local'
+
+    def subscribe(self, event_id):
+        # A single pending wake-up is enough, the stream reads every new change
+        subscriber = queue.Queue(maxsize=1)
+        with self.lock:
+            self.subscribers.setdefault(event_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, event_id, subscriber):
+        with self.lock:
+            subscribers = self.subscribers.get(event_id)
+            if subscribers:
+                subscribers.discard(subscriber)
+                if not subscribers:
+                    del self.subscribers[event_id]
+
+    def publish(self, event_id):
+        with self.lock:
+            subscribers = list(self.subscribers.get(event_id, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(event_id)
+            except queue.Full:
+                pass
+
+    def publish_all(self):
+        with self.lock:
+            event_ids = list(self.subscribers)
+        for event_id in event_ids:
+            self.publish(event_id)
+
+    def _listen(self, engine):
+        while True:
+            try:
+                # A dedicated connection, detached from the pool since it is
+                # switched to autocommit and held for the worker's lifetime
+                connection = engine.raw_connection()
+                connection.detach()
+                try:
+                    dbapi_connection = connection.dbapi_connection
+                    dbapi_connection.autocommit = True
+                    dbapi_connection.cursor().execute(f'LISTEN {NOTIFY_CHANNEL}')
+                    # Notifications may have been missed while reconnecting
+                    self.publish_all()
+                    while True:
+                        if select.select([dbapi_connection], [], [], HEARTBEAT_SECONDS) == ([], [], []):
+                            continue
+                        dbapi_connection.poll()
+                        while dbapi_connection.notifies:
+                            notify = dbapi_connection.notifies.pop(0)
+                            self.publish(int(notify.payload))
+                finally:
+                    connection.close()
+            except Exception:
+                logger.exception('Change listener failed, reconnecting')
+                time.sleep(1)
+
+
+broker = ChangeBroker()
+
+
+@event.listens_for(Session, 'after_commit')
+def publish_committed_changes(session):
+    event_ids = session.info.pop('changed_events', None)
+    if event_ids and broker.mode == 'local':
+        for event_id in event_ids:
+            broker.publish(event_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_rolled_back_changes(session):
+    session.info.pop('changed_events', None)
+
+
+"""
+Function: event_stream
+Purpose: Generates the Server-Sent Events of a single event.
+Parameters:
+    - event_id: ID of the event to follow.
+    - last_id: Cursor of the last change the client has seen.
+Yields: SSE messages, one per change, and heartbeat comments while idle.
+        The stream ends after the event's deletion or archival tombstone.
+"""
+
+def event_stream(event_id, last_id):
+    subscriber = broker.subscribe(event_id)
+    try:
+        # Subscribed before reading, so no change can slip in between
+        woken = True
+        while True:
+            if woken:
+                changes = [c.format() for c in Change.for_event(event_id, last_id)]
+                # Do not keep a transaction open while idle
+                db.session.rollback()
+                for change in changes:
+                    last_id = change['cursor']
+                    yield f"id: {last_id}\nevent: {change['entity']}\ndata: {json.dumps(change)}\n\n"
+                    if change['entity'] == 'event' and change['op'] in ('delete', 'archive'):
+                        return
+            try:
+                subscriber.get(timeout=HEARTBEAT_SECONDS)
+                woken = True
+            except queue.Empty:
+                woken = False
+                yield ': heartbeat\n\n'
+    finally:
+        broker.unsubscribe(event_id, subscriber)
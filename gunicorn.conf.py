@@ -0,0 +1,12 @@
+# Gunicorn reads this file from the working directory on start.
+
+# Start Job Runner
+# Starts the background job pool of each worker as soon as it boots, so
+# pending jobs and jobs orphaned by a stopped worker resume without waiting
+# for a request to touch the jobs endpoints. Imported in the worker, after
+# the fork, so the master process never loads the app or its database pool.
+
+def post_worker_init(worker):
+    from flaskr.jobs import runner
+
+    runner.start(worker.wsgi)
@@ -1,9 +1,75 @@
+import click
+from datetime import datetime, timedelta
 from flask_migrate import Migrate
 from flaskr import create_app
-from models import db, Event, Attendee, Schedule
+from models import db, Event, Attendee, Schedule, OrganizerStats, Job, IdempotencyKey, archive_events
+from flaskr.jobs import run_job, stale_before
+from flaskr.idempotency import IDEMPOTENCY_TTL_HOURS
 
 # Create the app instance
 app = create_app()
 
 # Set up the migration environment
 migrate = Migrate(app, db)
+
+# Reconcile Counts
+# Recomputes the denormalized attendee and schedule counts of every event.
+# Usage: flask --app manage reconcile-counts
+
+@app.cli.command('reconcile-counts')
+def reconcile_counts():
+    """Recompute events.attendee_count and events.schedule_count."""
+    fixed = Event.reconcile_counts()
+    click.echo(f'Corrected counts of {fixed} event(s).')
+
+# Refresh Stats
+# Rebuilds the organizer_stats rollup behind GET /organizers/<id>/stats.
+# Usage: flask --app manage refresh-stats
+
+@app.cli.command('refresh-stats')
+def refresh_stats():
+    """Rebuild the monthly organizer statistics."""
+    rows = OrganizerStats.refresh()
+    click.echo(f'Refreshed {rows} organizer month(s).')
+
+# Archive Events
+# Moves past events and their schedules and attendance links to the archive
+# tables, one committed chunk at a time.
+# Usage: flask --app manage archive-events [--before 2024-01-01] [--chunk-size 500]
+
+@app.cli.command('archive-events')
+@click.option('--before', type=click.DateTime(), default=None,
+              help='Archive events dated before this date (default: one year ago).')
+@click.option('--chunk-size', type=click.IntRange(min=1), default=500,
+              help='Number of events moved per transaction.')
+def archive_past_events(before, chunk_size):
+    """Move past events out of the hot tables."""
+    if before is None:
+        before = datetime.utcnow() - timedelta(days=365)
+    archived = archive_events(before, chunk_size=chunk_size)
+    click.echo(f'Archived {archived} event(s) dated before {before:%Y-%m-%d}.')
+
+# Run Jobs
+# Runs the pending background jobs, and those orphaned by a stopped worker, in
+# the foreground; for a dedicated job process or after a deploy.
+# Usage: flask --app manage run-jobs
+
+@app.cli.command('run-jobs')
+def run_jobs():
+    """Run pending and orphaned background jobs."""
+    ran = 0
+    for job_id in Job.claimable(stale_before()):
+        if Job.claim(job_id, stale_before()):
+            run_job(job_id)
+            ran += 1
+    click.echo(f'Ran {ran} job(s).')
+
+# Purge Idempotency Keys
+# Deletes the stored responses of Idempotency-Key requests past their TTL.
+# Usage: flask --app manage purge-idempotency-keys
+
+@app.cli.command('purge-idempotency-keys')
+def purge_idempotency_keys():
+    """Delete expired idempotency keys."""
+    purged = IdempotencyKey.purge(datetime.utcnow() - timedelta(hours=IDEMPOTENCY_TTL_HOURS))
+    click.echo(f'Purged {purged} idempotency key(s).')
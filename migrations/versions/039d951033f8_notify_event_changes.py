@@ -0,0 +1,39 @@
+"""Notify event changes
+
+Revision ID: 039d951033f8
+Revises: bb8632e77534
+Create Date: 2026-10-19 16:52:38.774410
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '039d951033f8'
+down_revision = 'bb8632e77534'
+branch_labels = None
+depends_on = None
+
+# Copied from models.py as of this revision, so later model changes do not
+# alter this migration
+CHANGE_NOTIFY_DDL = [
+    "CREATE OR REPLACE FUNCTION notify_event_change() RETURNS trigger AS $$ "
+    "BEGIN "
+    "IF NEW.event_id IS NOT NULL THEN PERFORM pg_notify('event_changes', NEW.event_id::text); END IF; "
+    "RETURN NEW; "
+    "END; $$ LANGUAGE plpgsql",
+    "CREATE TRIGGER changes_notify AFTER INSERT ON changes FOR EACH ROW EXECUTE FUNCTION notify_event_change()",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for statement in CHANGE_NOTIFY_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS changes_notify ON changes")
+        op.execute("DROP FUNCTION IF EXISTS notify_event_change()")
@@ -0,0 +1,33 @@
+"""Add schedule time range index
+
+Revision ID: 10e5bc09255d
+Revises: 47c60e552e2c
+Create Date: 2026-10-19 23:41:52.508316
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '10e5bc09255d'
+down_revision = '47c60e552e2c'
+branch_labels = None
+depends_on = None
+
+# Copied from models.py as of this revision, so later model changes do not
+# alter this migration
+SCHEDULE_RANGE_DDL = [
+    "CREATE INDEX ix_schedules_time_range ON schedules USING gist (tsrange(start_time, end_time))",
+]
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for statement in SCHEDULE_RANGE_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_schedules_time_range")
@@ -0,0 +1,61 @@
+"""Add event full-text search
+
+Revision ID: 5607976d4409
+Revises: 551bff54407f
+Create Date: 2026-10-19 10:03:41.902115
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5607976d4409'
+down_revision = '551bff54407f'
+branch_labels = None
+depends_on = None
+
+# Copied from models.py as of this revision, so later model changes do not
+# alter this migration
+EVENT_SEARCH_DDL = {
+    'postgresql': [
+        "ALTER TABLE events ADD COLUMN search_vector tsvector",
+        "CREATE INDEX ix_events_search_vector ON events USING gin (search_vector)",
+        "CREATE TRIGGER events_search_vector_update BEFORE INSERT OR UPDATE OF name, description "
+        "ON events FOR EACH ROW EXECUTE FUNCTION "
+        "tsvector_update_trigger(search_vector, 'pg_catalog.english', name, description)",
+        "UPDATE events SET search_vector = to_tsvector('pg_catalog.english', "
+        "coalesce(name, '') || ' ' || coalesce(description, ''))",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE events_fts USING fts5(name, description, content='events', content_rowid='id')",
+        "CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN "
+        "INSERT INTO events_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER events_fts_update AFTER UPDATE OF name, description ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO events_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+    ],
+}
+
+
+def upgrade():
+    for statement in EVENT_SEARCH_DDL.get(op.get_bind().dialect.name, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute("DROP TRIGGER IF EXISTS events_search_vector_update ON events")
+        op.drop_index('ix_events_search_vector', table_name='events')
+        op.drop_column('events', 'search_vector')
+    elif dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS events_fts_insert")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_delete")
+        op.execute("DROP TRIGGER IF EXISTS events_fts_update")
+        op.execute("DROP TABLE IF EXISTS events_fts")
@@ -0,0 +1,72 @@
+"""Add schedule overlap constraints
+
+Revision ID: d706767faa8e
+Revises: 5607976d4409
+Create Date: 2026-10-19 11:27:15.640388
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd706767faa8e'
+down_revision = '5607976d4409'
+branch_labels = None
+depends_on = None
+
+# Copied from models.py as of this revision, so later model changes do not
+# alter this migration
+SCHEDULE_OVERLAP_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE schedules ADD CONSTRAINT ex_schedules_no_overlap "
+    "EXCLUDE USING gist (event_id WITH =, tsrange(start_time, end_time) WITH &&)",
+]
+
+
+# Existing rows the new constraints would reject
+INVERTED_SCHEDULES = "SELECT id FROM schedules WHERE end_time <= start_time ORDER BY id"
+OVERLAPPING_SCHEDULES = (
+    "SELECT a.id, b.id FROM schedules a JOIN schedules b "
+    "ON a.event_id = b.event_id AND a.id < b.id "
+    "AND a.start_time < b.end_time AND a.end_time > b.start_time "
+    "ORDER BY a.id, b.id"
+)
+
+
+def check_existing_schedules(connection):
+    # Fails with the offending ids instead of a bare constraint violation,
+    # so the data can be fixed (see GET /events/<id>/schedule/conflicts)
+    # before upgrading again
+    problems = []
+    inverted = connection.execute(sa.text(INVERTED_SCHEDULES)).scalars().all()
+    if inverted:
+        problems.append(f"schedules ending before they start: {', '.join(map(str, inverted))}")
+    if connection.dialect.name == 'postgresql':
+        pairs = connection.execute(sa.text(OVERLAPPING_SCHEDULES)).all()
+        if pairs:
+            problems.append(f"overlapping schedules: {', '.join(f'{a}/{b}' for a, b in pairs)}")
+    if problems:
+        raise RuntimeError("Fix or delete these rows before adding the schedule constraints; "
+                           + "; ".join(problems))
+
+
+def upgrade():
+    check_existing_schedules(op.get_bind())
+
+    with op.batch_alter_table('schedules', schema=None) as batch_op:
+        batch_op.create_index('ix_schedules_event_id_start_time', ['event_id', 'start_time'], unique=False)
+        batch_op.create_check_constraint('ck_schedules_end_after_start', 'end_time > start_time')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        for statement in SCHEDULE_OVERLAP_DDL:
+            op.execute(statement)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute("ALTER TABLE schedules DROP CONSTRAINT IF EXISTS ex_schedules_no_overlap")
+
+    with op.batch_alter_table('schedules', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_schedules_end_after_start', type_='check')
+        batch_op.drop_index('ix_schedules_event_id_start_time')
@@ -1,6 +1,9 @@
 import os
-from sqlalchemy import Column, String, Integer, DateTime, ForeignKey, Table
-from sqlalchemy.orm import relationship
+import heapq
+from datetime import datetime, date, timedelta
+from sqlalchemy import Column, String, Integer, Float, Date, DateTime, ForeignKey, Table, Index, CheckConstraint, DDL, event, text, insert, update, select, delete, func, cast, literal, union_all, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import relationship, Session, attributes
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 
@@ -10,6 +13,41 @@ if database_path.startswith("postgres://"):
 
 db = SQLAlchemy()
 
+def upsert(dialect_name, table, values, index_elements, set_):
+    """
+    Builds an INSERT ... ON CONFLICT DO UPDATE statement for Postgres or SQLite.
+
+    Args:
+        set_ (callable): Receives the statement's excluded row and returns
+            the columns to update on conflict.
+    """
+    dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    statement = dialect_insert(table).values(values)
+    return statement.on_conflict_do_update(index_elements=index_elements, set_=set_(statement.excluded))
+
+def insert_ignore(dialect_name, table, values, index_elements=None):
+    """
+    Builds an INSERT ... ON CONFLICT DO NOTHING statement for Postgres or
+    SQLite; its rowcount is 0 when the row already existed.
+
+    Args:
+        values (dict, list or Select): The row, a list of rows inserted with
+            a single multi-row VALUES, or a SELECT of at most one row with a
+            value for every column of the table, in order.
+    """
+    dialect_insert = postgresql.insert if dialect_name == 'postgresql' else sqlite.insert
+    if isinstance(values, (dict, list)):
+        statement = dialect_insert(table).values(values)
+    else:
+        statement = dialect_insert(table).from_select([column.name for column in table.c], values)
+    return statement.on_conflict_do_nothing(index_elements=index_elements)
+
+def month_of(column):
+    # SQL expression truncating a timestamp to the first day of its month
+    if db.engine.dialect.name == 'postgresql':
+        return cast(func.date_trunc('month', column), Date)
+    return func.date(column, 'start of month')
+
 def setup_db(app, database_path=database_path):
     app.config["SQLALCHEMY_DATABASE_URI"] = database_path
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
@@ -17,11 +55,14 @@ def setup_db(app, database_path=database_path):
     db.init_app(app)
     Migrate(app, db)
 
+# The (attendee_id, event_id) primary key serves lookups by attendee; the
+# event_id index serves lookups of an event's attendees.
 attendances = Table(
     'attendances',
     db.metadata,
     Column('attendee_id', Integer, ForeignKey('attendees.id'), primary_key=True),
-    Column('event_id', Integer, ForeignKey('events.id'), primary_key=True)
+    Column('event_id', Integer, ForeignKey('events.id'), primary_key=True),
+    Index('ix_attendances_event_id', 'event_id')
 )
 
 class Event(db.Model):
@@ -29,10 +70,21 @@ class Event(db.Model):
     id = Column(Integer, primary_key=True)
     name = Column(String, unique=True, nullable=False)
     description = Column(String, nullable=True)
-    date = Column(DateTime, nullable=False)
+    date = Column(DateTime, nullable=False, index=True)
     organizer_id = Column(Integer, nullable=False)
+    # A null capacity means unlimited seats
+    capacity = Column(Integer, nullable=True)
+    attendee_count = Column(Integer, nullable=False, default=0, server_default='0')
+    schedule_count = Column(Integer, nullable=False, default=0, server_default='0')
     schedules = relationship('Schedule', backref="event", lazy=True)
     attendees = relationship('Attendee', secondary=attendances, backref=db.backref('events', lazy=True))
+    # The search_vector column (Postgres) and the events_fts table (SQLite)
+    # are managed by the database, see EVENT_SEARCH_DDL below.
+
+    # Serves the per-organizer listings of the organizer stats
+    __table_args__ = (
+        Index('ix_events_organizer_id_date', 'organizer_id', 'date'),
+    )
 
     def insert(self):
         db.session.add(self)
@@ -42,9 +94,441 @@ class Event(db.Model):
         db.session.commit()
 
     def delete(self):
+        # Bulk deletes the dependents instead of the ORM loading them, and
+        # nulling the schedules' non-nullable event_id
+        Event.delete_dependents(self.id)
+        db.session.expire(self, ['schedules', 'attendees'])
         db.session.delete(self)
         db.session.commit()
 
+    @staticmethod
+    def delete_dependents(event_id, limit=None):
+        """
+        Deletes the waitlist entries, attendance links and schedules of an
+        event, at most limit rows of each when a limit is given. The deleted
+        schedules and attendance links are logged as tombstones in the
+        change log, like single deletes.
+
+        Returns:
+            int: Number of rows deleted.
+        """
+        def chunk(column, key):
+            statement = delete(column.table).where(column == event_id)
+            if limit is not None:
+                statement = statement.where(key.in_(select(key).where(column == event_id).limit(limit)))
+            return statement
+
+        deleted = db.session.execute(chunk(WaitlistEntry.__table__.c.event_id, WaitlistEntry.__table__.c.id)).rowcount
+        attendee_ids = db.session.execute(
+            chunk(attendances.c.event_id, attendances.c.attendee_id).returning(attendances.c.attendee_id)
+        ).scalars().all()
+        schedule_ids = db.session.execute(
+            chunk(Schedule.__table__.c.event_id, Schedule.__table__.c.id).returning(Schedule.__table__.c.id)
+        ).scalars().all()
+        rows = [Change.row('attendance', attendee_id, 'delete', event_id,
+                           {'attendee_id': attendee_id, 'event_id': event_id})
+                for attendee_id in attendee_ids]
+        rows.extend(Change.row('schedule', schedule_id, 'delete', event_id) for schedule_id in schedule_ids)
+        if rows:
+            write_changes(db.session(), rows)
+        return deleted + len(rows)
+
+    @staticmethod
+    def reserve_seat(event_id):
+        """
+        Atomically takes a seat of an event with a single conditional UPDATE.
+
+        The row lock taken by the UPDATE is held until the transaction ends,
+        so callers should issue it last and commit right away.
+
+        Returns:
+            bool: True if a seat was reserved, False if the event is full.
+        """
+        result = db.session.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .where(or_(Event.capacity.is_(None), Event.attendee_count < Event.capacity))
+            .values(attendee_count=Event.attendee_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount == 1
+
+    @staticmethod
+    def release_seat(event_id):
+        Event.adjust_counts(event_id, attendees=-1)
+
+    @staticmethod
+    def adjust_counts(event_id, attendees=0, schedules=0):
+        """
+        Shifts the denormalized attendee_count and schedule_count of an event
+        by the given deltas, in the caller's transaction.
+        """
+        db.session.execute(
+            update(Event)
+            .where(Event.id == event_id)
+            .values(attendee_count=Event.attendee_count + attendees,
+                    schedule_count=Event.schedule_count + schedules)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def reconcile_counts():
+        """
+        Recomputes attendee_count and schedule_count from the attendances and
+        schedules tables, fixing any drift.
+
+        Returns:
+            int: Number of events whose counts were corrected.
+        """
+        attendee_total = (select(func.count())
+                          .select_from(attendances)
+                          .where(attendances.c.event_id == Event.id)
+                          .scalar_subquery())
+        schedule_total = (select(func.count())
+                          .select_from(Schedule)
+                          .where(Schedule.event_id == Event.id)
+                          .scalar_subquery())
+        result = db.session.execute(
+            update(Event)
+            .where(or_(Event.attendee_count != attendee_total, Event.schedule_count != schedule_total))
+            .values(attendee_count=attendee_total, schedule_count=schedule_total)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def register(self, name, email, waitlist=False):
+        """
+        Registers an attendee for the event, or adds them to its waitlist
+        when the event is full and waitlist is True. The attendee is upserted
+        by email and the attendance link is inserted unless it exists, so
+        repeating a registration is harmless; an attendee already on the
+        waitlist stays there.
+
+        Returns:
+            tuple: ('registered', 'already_registered', 'waitlisted' or
+                    'full', attendee id)
+        """
+        dialect_name = db.session.get_bind().dialect.name
+        attendee_id = db.session.execute(
+            upsert(dialect_name, Attendee.__table__, {'name': name, 'email': email}, ['email'],
+                   lambda excluded: {'name': excluded.name})
+            .returning(Attendee.__table__.c.id)
+        ).scalar_one()
+        link = {'attendee_id': attendee_id, 'event_id': self.id}
+        waitlisted = (select(WaitlistEntry.id)
+                      .where(WaitlistEntry.event_id == self.id, WaitlistEntry.attendee_id == attendee_id)
+                      .exists())
+        # Not linked while on the waitlist, which keeps its place in line
+        unless_waitlisted = select(literal(attendee_id, Integer), literal(self.id, Integer)).where(~waitlisted)
+        if db.session.execute(insert_ignore(dialect_name, attendances, unless_waitlisted)).rowcount == 0:
+            registered = db.session.execute(
+                select(attendances.c.attendee_id)
+                .where(attendances.c.attendee_id == attendee_id, attendances.c.event_id == self.id)
+            ).first() is not None
+            db.session.commit()
+            return 'already_registered' if registered else 'waitlisted', attendee_id
+
+        if Event.reserve_seat(self.id):
+            Change.record_attendance('insert', attendee_id, self.id)
+            db.session.commit()
+            return 'registered', attendee_id
+
+        if not waitlist:
+            db.session.rollback()
+            return 'full', attendee_id
+        db.session.execute(attendances.delete().where(attendances.c.attendee_id == attendee_id,
+                                                      attendances.c.event_id == self.id))
+        db.session.execute(insert_ignore(dialect_name, WaitlistEntry.__table__,
+                                         {**link, 'created_at': datetime.utcnow()},
+                                         ['event_id', 'attendee_id']))
+        db.session.commit()
+        return 'waitlisted', attendee_id
+
+    @staticmethod
+    def register_many(event_id, people, waitlist=False):
+        """
+        Registers many attendees for an event in one transaction, creating
+        the attendees whose email address is new. Seats are counted under a
+        lock on the event row; attendees past its capacity are waitlisted
+        when waitlist is True. Does not commit.
+
+        Attendees, links and waitlist entries are inserted unless they
+        exist, so rows committed meanwhile by concurrent registrations are
+        skipped instead of failing the whole batch.
+
+        Args:
+            people (list): Dicts with the 'name' and 'email' of each attendee.
+
+        Returns:
+            dict: Number of attendees 'registered', 'waitlisted', 'full' and
+                  'skipped' (already registered or waitlisted).
+        """
+        counts = dict.fromkeys(('registered', 'waitlisted', 'full', 'skipped'), 0)
+        dialect_name = db.session.get_bind().dialect.name
+        emails = [person['email'] for person in people]
+        ids = dict(db.session.query(Attendee.email, Attendee.id).filter(Attendee.email.in_(emails)))
+        new = {}
+        for person in people:
+            if person['email'] not in ids and person['email'] not in new:
+                new[person['email']] = {'name': person['name'], 'email': person['email']}
+        if new:
+            # Attendees created meanwhile by other registrations are kept
+            db.session.execute(insert_ignore(dialect_name, Attendee.__table__, list(new.values()), ['email']))
+            ids.update(db.session.query(Attendee.email, Attendee.id).filter(Attendee.email.in_(new)))
+
+        # Locked before reading the links, so other batches wait until this
+        # one commits and then see its registrations
+        event = db.session.execute(
+            select(Event.capacity, Event.attendee_count).where(Event.id == event_id).with_for_update()
+        ).one()
+        seen = set(db.session.execute(
+            select(attendances.c.attendee_id)
+            .where(attendances.c.event_id == event_id, attendances.c.attendee_id.in_(ids.values()))
+        ).scalars())
+        seen.update(db.session.execute(
+            select(WaitlistEntry.attendee_id)
+            .where(WaitlistEntry.event_id == event_id, WaitlistEntry.attendee_id.in_(ids.values()))
+        ).scalars())
+        pending = []
+        for email in emails:
+            if ids[email] in seen:
+                counts['skipped'] += 1
+            else:
+                seen.add(ids[email])
+                pending.append(ids[email])
+
+        seats = len(pending) if event.capacity is None else max(0, event.capacity - event.attendee_count)
+        seated = []
+        # Links inserted meanwhile by single registrations are skipped, and
+        # their seats offered to the next attendees in the batch
+        while pending and len(seated) < seats:
+            batch, pending = pending[:seats - len(seated)], pending[seats - len(seated):]
+            inserted = db.session.execute(
+                insert_ignore(dialect_name, attendances,
+                              [{'attendee_id': a, 'event_id': event_id} for a in batch])
+                .returning(attendances.c.attendee_id)
+            ).scalars().all()
+            counts['skipped'] += len(batch) - len(inserted)
+            seated.extend(inserted)
+        if seated:
+            db.session.execute(
+                update(Event)
+                .where(Event.id == event_id)
+                .values(attendee_count=Event.attendee_count + len(seated))
+                .execution_options(synchronize_session=False)
+            )
+            write_changes(db.session(), [
+                Change.row('attendance', a, 'insert', event_id, {'attendee_id': a, 'event_id': event_id})
+                for a in seated
+            ])
+            counts['registered'] = len(seated)
+        if pending and waitlist:
+            now = datetime.utcnow()
+            waitlisted = db.session.execute(
+                insert_ignore(dialect_name, WaitlistEntry.__table__,
+                              [{'event_id': event_id, 'attendee_id': a, 'created_at': now} for a in pending],
+                              ['event_id', 'attendee_id'])
+            ).rowcount
+            counts['waitlisted'] = waitlisted
+            counts['skipped'] += len(pending) - waitlisted
+        else:
+            counts['full'] = len(pending)
+        return counts
+
+    def unregister(self, attendee_id):
+        """
+        Removes an attendee from the event (or from its waitlist) and gives
+        a freed seat to the first attendee on the waitlist.
+
+        Returns:
+            tuple: (bool: whether the attendee was registered or waitlisted,
+                    promoted attendee id or None)
+        """
+        result = db.session.execute(
+            attendances.delete()
+            .where(attendances.c.event_id == self.id)
+            .where(attendances.c.attendee_id == attendee_id)
+        )
+        if result.rowcount == 0:
+            removed = WaitlistEntry.query.filter_by(event_id=self.id, attendee_id=attendee_id).delete()
+            db.session.commit()
+            return removed > 0, None
+        Change.record_attendance('delete', attendee_id, self.id)
+
+        # The seat passes straight to the promoted attendee
+        promoted = Event.promote(self.id, seats=1)
+        if promoted:
+            promoted, = promoted
+        else:
+            Event.release_seat(self.id)
+            promoted = None
+        db.session.commit()
+        return True, promoted
+
+    def set_capacity(self, capacity):
+        """
+        Changes the capacity of the event and gives the seats it frees to the
+        first attendees on the waitlist. The event row is locked first, so
+        concurrent registrations cannot take the seats in between. Does not
+        commit.
+
+        Returns:
+            list: Promoted attendee ids, or None when the capacity is below
+                  the number of registered attendees.
+        """
+        attendee_count = db.session.execute(
+            select(Event.attendee_count).where(Event.id == self.id).with_for_update()
+        ).scalar_one()
+        if capacity is not None and capacity < attendee_count:
+            return None
+        self.capacity = capacity
+        seats = None if capacity is None else capacity - attendee_count
+        if seats == 0:
+            return []
+        promoted = Event.promote(self.id, seats)
+        if promoted:
+            Event.adjust_counts(self.id, attendees=len(promoted))
+        return promoted
+
+    @staticmethod
+    def promote(event_id, seats=None):
+        """
+        Seats the first attendees on the waitlist of an event, up to seats
+        attendees or the whole waitlist when seats is None, and removes their
+        entries. Entries of attendees who are already seated are removed
+        without taking a seat. Does not commit or touch attendee_count.
+
+        Returns:
+            list: Promoted attendee ids.
+        """
+        dialect_name = db.session.get_bind().dialect.name
+        promoted = []
+        while seats is None or len(promoted) < seats:
+            # Concurrent promotions each take different waitlist entries
+            entries = (WaitlistEntry.query
+                       .filter_by(event_id=event_id)
+                       .order_by(WaitlistEntry.id)
+                       .limit(None if seats is None else seats - len(promoted))
+                       .with_for_update(skip_locked=True)
+                       .all())
+            if not entries:
+                break
+            for entry in entries:
+                link = {'attendee_id': entry.attendee_id, 'event_id': event_id}
+                if db.session.execute(insert_ignore(dialect_name, attendances, link)).rowcount == 1:
+                    Change.record_attendance('insert', entry.attendee_id, event_id)
+                    promoted.append(entry.attendee_id)
+                db.session.delete(entry)
+            db.session.flush()
+        return promoted
+
+    @staticmethod
+    def for_attendee(attendee_id):
+        # Joins through the attendances primary key without loading any
+        # attendee collections
+        return (Event.query
+                .join(attendances, attendances.c.event_id == Event.id)
+                .filter(attendances.c.attendee_id == attendee_id)
+                .order_by(Event.date, Event.id))
+
+    @staticmethod
+    def load_many(ids, schedules=False, attendees=False):
+        """
+        Loads many events, and optionally their schedules and attendees, with
+        one batched IN query per table instead of one round trip per event.
+
+        Returns:
+            dict: Event details keyed by event id; missing ids are absent.
+        """
+        events = {}
+        for e in Event.query.filter(Event.id.in_(set(ids))).all():
+            events[e.id] = {
+                'id': e.id,
+                'name': e.name,
+                'description': e.description,
+                'date': e.date.isoformat(),
+                'capacity': e.capacity,
+                'attendee_count': e.attendee_count,
+                'schedule_count': e.schedule_count
+            }
+        if not events:
+            return events
+
+        if schedules:
+            for details in events.values():
+                details['schedules'] = []
+            rows = (Schedule.query
+                    .filter(Schedule.event_id.in_(events.keys()))
+                    .order_by(Schedule.event_id, Schedule.start_time)
+                    .all())
+            for s in rows:
+                events[s.event_id]['schedules'].append({
+                    'id': s.id,
+                    'title': s.title,
+                    'start_time': s.start_time.isoformat(),
+                    'end_time': s.end_time.isoformat()
+                })
+
+        if attendees:
+            for details in events.values():
+                details['attendees'] = []
+            rows = (db.session.query(attendances.c.event_id, Attendee)
+                    .join(Attendee, Attendee.id == attendances.c.attendee_id)
+                    .filter(attendances.c.event_id.in_(events.keys()))
+                    .order_by(attendances.c.event_id, Attendee.id)
+                    .all())
+            for event_id, a in rows:
+                events[event_id]['attendees'].append(a.format())
+
+        return events
+
+    @staticmethod
+    def search(terms, page=1, per_page=10):
+        """
+        Full-text search over event names and descriptions.
+
+        Uses the GIN-indexed search_vector column on Postgres and the
+        events_fts FTS5 table on SQLite. Results are ordered by relevance.
+
+        Returns:
+            tuple: (rows of id, name, description, date, rank; total matches)
+        """
+        offset = (page - 1) * per_page
+        if db.engine.dialect.name == 'postgresql':
+            match = (
+                "FROM events, plainto_tsquery('english', :terms) AS query "
+                "WHERE events.search_vector @@ query"
+            )
+            rank = "ts_rank(events.search_vector, query)"
+            order = "rank DESC, events.id"
+        else:
+            # Quote every word so FTS5 operators in user input are searched literally
+            terms = ' '.join('"{}"'.format(word.replace('"', '""')) for word in terms.split())
+            match = "FROM events_fts JOIN events ON events.id = events_fts.rowid WHERE events_fts MATCH :terms"
+            rank = "-bm25(events_fts)"
+            order = "rank DESC, events.id"
+
+        rows = db.session.execute(
+            text(
+                f"SELECT events.id, events.name, events.description, events.date, {rank} AS rank "
+                f"{match} ORDER BY {order} LIMIT :limit OFFSET :offset"
+            ).columns(Event.id, Event.name, Event.description, Event.date, rank=Float),
+            {'terms': terms, 'limit': per_page, 'offset': offset}
+        ).all()
+        total = db.session.execute(text(f"SELECT count(*) {match}"), {'terms': terms}).scalar()
+        return rows, total
+
+    def summary(self):
+        # List representation; only reads columns of the events table
+        return {
+            'id': self.id,
+            'name': self.name,
+            'date': self.date.isoformat(),
+            'attendee_count': self.attendee_count,
+            'schedule_count': self.schedule_count
+        }
+
     def format(self):
         return {
             'id': self.id,
@@ -52,10 +536,44 @@ class Event(db.Model):
             'description': self.description,
             'date': self.date,
             'organizer_id': self.organizer_id,
+            'capacity': self.capacity,
+            'attendee_count': self.attendee_count,
+            'schedule_count': self.schedule_count,
             'schedules': [schedule.format() for schedule in self.schedules],
             'attendees': [attendee.format() for attendee in self.attendees]
         }
 
+# Full-text search support. The search structures are maintained by the
+# database itself so every write path keeps them current.
+EVENT_SEARCH_DDL = {
+    'postgresql': [
+        "ALTER TABLE events ADD COLUMN search_vector tsvector",
+        "CREATE INDEX ix_events_search_vector ON events USING gin (search_vector)",
+        "CREATE TRIGGER events_search_vector_update BEFORE INSERT OR UPDATE OF name, description "
+        "ON events FOR EACH ROW EXECUTE FUNCTION "
+        "tsvector_update_trigger(search_vector, 'pg_catalog.english', name, description)",
+        "UPDATE events SET search_vector = to_tsvector('pg_catalog.english', "
+        "coalesce(name, '') || ' ' || coalesce(description, ''))",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE events_fts USING fts5(name, description, content='events', content_rowid='id')",
+        "CREATE TRIGGER events_fts_insert AFTER INSERT ON events BEGIN "
+        "INSERT INTO events_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "CREATE TRIGGER events_fts_delete AFTER DELETE ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); END",
+        "CREATE TRIGGER events_fts_update AFTER UPDATE OF name, description ON events BEGIN "
+        "INSERT INTO events_fts(events_fts, rowid, name, description) "
+        "VALUES ('delete', old.id, old.name, old.description); "
+        "INSERT INTO events_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+        "INSERT INTO events_fts(events_fts) VALUES ('rebuild')",
+    ],
+}
+
+for dialect, statements in EVENT_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(Event.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
+
 class Attendee(db.Model):
     __tablename__ = 'attendees'
     id = Column(Integer, primary_key=True)
@@ -80,6 +598,34 @@ class Attendee(db.Model):
             'email': self.email
         }
 
+class WaitlistEntry(db.Model):
+    __tablename__ = 'waitlist'
+    id = Column(Integer, primary_key=True)
+    event_id = Column(Integer, ForeignKey('events.id', ondelete='CASCADE'), nullable=False)
+    attendee_id = Column(Integer, ForeignKey('attendees.id', ondelete='CASCADE'), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    attendee = relationship('Attendee')
+
+    # Serves the first-come, first-served lookup of an event's waitlist
+    __table_args__ = (
+        Index('ix_waitlist_event_id_id', 'event_id', 'id'),
+        db.UniqueConstraint('event_id', 'attendee_id', name='uq_waitlist_event_id_attendee_id'),
+    )
+
+    def position(self):
+        return WaitlistEntry.query.filter(
+            WaitlistEntry.event_id == self.event_id,
+            WaitlistEntry.id <= self.id
+        ).count()
+
+    def format(self):
+        return {
+            'id': self.id,
+            'event_id': self.event_id,
+            'attendee_id': self.attendee_id,
+            'position': self.position()
+        }
+
 class Schedule(db.Model):
     __tablename__ = 'schedules'
     id = Column(Integer, primary_key=True)
@@ -88,8 +634,17 @@ class Schedule(db.Model):
     end_time = Column(DateTime, nullable=False)
     event_id = Column(Integer, ForeignKey('events.id'), nullable=False)
 
+    # Serves time-window lookups for schedule-level calendar views and
+    # per-event interval queries for overlap detection
+    __table_args__ = (
+        Index('ix_schedules_start_time_end_time', 'start_time', 'end_time'),
+        Index('ix_schedules_event_id_start_time', 'event_id', 'start_time'),
+        CheckConstraint('end_time > start_time', name='ck_schedules_end_after_start'),
+    )
+
     def insert(self):
         db.session.add(self)
+        Event.adjust_counts(self.event_id, schedules=1)
         db.session.commit()
 
     def update(self):
@@ -97,8 +652,101 @@ class Schedule(db.Model):
 
     def delete(self):
         db.session.delete(self)
+        Event.adjust_counts(self.event_id, schedules=-1)
         db.session.commit()
 
+    @staticmethod
+    def find_conflicts(event_id, start_time, end_time, exclude_id=None):
+        """
+        Returns the schedules of an event overlapping [start_time, end_time).
+
+        Back-to-back slots (one ending when the next starts) do not overlap.
+        Pass exclude_id to ignore the schedule being updated.
+        """
+        query = Schedule.query.filter(
+            Schedule.event_id == event_id,
+            Schedule.start_time < end_time,
+            Schedule.end_time > start_time
+        )
+        if exclude_id is not None:
+            query = query.filter(Schedule.id != exclude_id)
+        return query.order_by(Schedule.start_time).all()
+
+    @staticmethod
+    def overlapping_pairs(event_id):
+        """
+        Finds every pair of overlapping schedules of an event.
+
+        Sweeps the schedules in start_time order (served by the
+        event_id/start_time index) while keeping the active ones in a heap
+        keyed by end_time, which runs in O(n log n + k) for k conflicts.
+
+        Returns:
+            list: (earlier, later) Schedule tuples
+        """
+        schedules = Schedule.query.filter_by(event_id=event_id).order_by(Schedule.start_time, Schedule.id).all()
+        active = []
+        pairs = []
+        for schedule in schedules:
+            while active and active[0][0] <= schedule.start_time:
+                heapq.heappop(active)
+            pairs.extend((other, schedule) for _, _, other in active)
+            heapq.heappush(active, (schedule.end_time, schedule.id, schedule))
+        return pairs
+
+    @staticmethod
+    def for_day(day, organizer_id=None):
+        """
+        Selects the schedules of all events in progress during a day, including
+        sessions running past midnight into or out of it, in start_time order,
+        with the name of their event. On Postgres the overlap is also tested
+        with the range operator served by the ix_schedules_time_range GiST
+        index, since neither bound of a b-tree range scan would be selective.
+
+        Returns:
+            Select: Statement of (id, title, start_time, end_time, event_id,
+                    event_name) rows.
+        """
+        start = datetime.combine(day, datetime.min.time())
+        end = start + timedelta(days=1)
+        statement = (select(Schedule.id, Schedule.title, Schedule.start_time, Schedule.end_time,
+                            Schedule.event_id, Event.name.label('event_name'))
+                     .join(Event, Event.id == Schedule.event_id)
+                     .where(Schedule.start_time < end, Schedule.end_time > start))
+        if db.engine.dialect.name == 'postgresql':
+            statement = statement.where(
+                func.tsrange(Schedule.start_time, Schedule.end_time).op('&&')(func.tsrange(start, end))
+            )
+        if organizer_id is not None:
+            statement = statement.where(Event.organizer_id == organizer_id)
+        return statement.order_by(Schedule.start_time, Schedule.id)
+
+    @staticmethod
+    def hourly_occupancy(day, organizer_id=None):
+        """
+        Counts the schedules of for_day in progress during each hour of the
+        day, with a single aggregate query over a 24-row table of hours.
+
+        Returns:
+            list: 24 counts, from 00:00-01:00 to 23:00-24:00.
+        """
+        start = datetime.combine(day, datetime.min.time())
+        hours = union_all(*(
+            select(literal(hour).label('hour'),
+                   literal(start + timedelta(hours=hour), DateTime).label('hour_start'),
+                   literal(start + timedelta(hours=hour + 1), DateTime).label('hour_end'))
+            for hour in range(24)
+        )).cte('hours')
+        day_schedules = Schedule.for_day(day, organizer_id).order_by(None).subquery()
+        rows = db.session.execute(
+            select(hours.c.hour, func.count(day_schedules.c.id))
+            .select_from(hours.outerjoin(day_schedules, and_(day_schedules.c.start_time < hours.c.hour_end,
+                                                              day_schedules.c.end_time > hours.c.hour_start)))
+            .group_by(hours.c.hour)
+            .order_by(hours.c.hour)
+        )
+        return [count for hour, count in rows]
+
     def format(self):
         return {
             'id': self.id,
@@ -107,3 +755,614 @@ class Schedule(db.Model):
             'end_time': self.end_time,
             'event_id': self.event_id
         }
+
+# On Postgres an exclusion constraint over the schedule time ranges rejects
+# overlapping slots even when two requests race past the application check.
+SCHEDULE_OVERLAP_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "ALTER TABLE schedules ADD CONSTRAINT ex_schedules_no_overlap "
+    "EXCLUDE USING gist (event_id WITH =, tsrange(start_time, end_time) WITH &&)",
+]
+
+for statement in SCHEDULE_OVERLAP_DDL:
+    event.listen(Schedule.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+# Serves the lookup of the schedules overlapping a time window, see for_day
+SCHEDULE_RANGE_DDL = [
+    "CREATE INDEX ix_schedules_time_range ON schedules USING gist (tsrange(start_time, end_time))",
+]
+
+for statement in SCHEDULE_RANGE_DDL:
+    event.listen(Schedule.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+class Change(db.Model):
+    """
+    Append-only log of inserts, updates and deletes of events, schedules and
+    attendance links. The id is the cursor consumers sync from; deletes are
+    kept as tombstones with no data.
+    """
+    __tablename__ = 'changes'
+    id = Column(Integer, primary_key=True)
+    entity = Column(String, nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    # The event an entry belongs to, for per-event feeds
+    event_id = Column(Integer, nullable=True)
+    op = Column(String, nullable=False)
+    data = Column(db.JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index('ix_changes_event_id_id', 'event_id', 'id'),
+        Index('ix_changes_event_id_entity_id', 'event_id', 'entity', 'id'),
+    )
+
+    @staticmethod
+    def row(entity, entity_id, op, event_id=None, data=None):
+        return {
+            'entity': entity,
+            'entity_id': entity_id,
+            'event_id': event_id,
+            'op': op,
+            'data': data,
+            'created_at': datetime.utcnow()
+        }
+
+    @staticmethod
+    def record_attendance(op, attendee_id, event_id):
+        # Attendance links are written with Core statements, so they are
+        # logged explicitly instead of by the flush listener below.
+        data = {'attendee_id': attendee_id, 'event_id': event_id}
+        write_changes(db.session(), [Change.row('attendance', attendee_id, op, event_id, data)])
+
+    @staticmethod
+    def since(cursor, limit):
+        return Change.query.filter(Change.id > cursor).order_by(Change.id).limit(limit).all()
+
+    @staticmethod
+    def for_event(event_id, cursor):
+        return Change.query.filter(Change.event_id == event_id, Change.id > cursor).order_by(Change.id).all()
+
+    @staticmethod
+    def latest_id(event_id):
+        # Served by the (event_id, id) index
+        return db.session.query(func.max(Change.id)).filter(Change.event_id == event_id).scalar() or 0
+
+    @staticmethod
+    def head():
+        # Cursor of the latest change overall; served by the primary key
+        return db.session.query(func.max(Change.id)).scalar() or 0
+
+    @staticmethod
+    def changed_events(after, upto, limit):
+        """Distinct ids of the events with changes in the (after, upto] cursor range, at most limit."""
+        return db.session.execute(
+            select(Change.event_id)
+            .where(Change.id > after, Change.id <= upto, Change.event_id.isnot(None))
+            .distinct()
+            .limit(limit)
+        ).scalars().all()
+
+    @staticmethod
+    def feed_versions(event_ids):
+        """
+        Latest event or schedule change of each event, ignoring attendance
+        changes, which do not alter its calendar feed. Served by the
+        (event_id, entity, id) index.
+
+        Returns:
+            dict: Version keyed by event id; 0 for events with no changes.
+        """
+        versions = dict.fromkeys(event_ids, 0)
+        if versions:
+            rows = (db.session.query(Change.event_id, func.max(Change.id))
+                    .filter(Change.event_id.in_(versions.keys()), Change.entity.in_(('event', 'schedule')))
+                    .group_by(Change.event_id))
+            versions.update(rows)
+        return versions
+
+    def format(self):
+        return {
+            'cursor': self.id,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'event_id': self.event_id,
+            'op': self.op,
+            'data': self.data,
+            'created_at': self.created_at.isoformat()
+        }
+
+
+# Key of the Postgres advisory lock serializing the change log inserts
+CHANGE_LOG_LOCK = 0x6368616e
+
+
+def write_changes(session, rows):
+    # Buffered until the transaction commits, see insert_changes below
+    session.info.setdefault('pending_changes', []).extend(rows)
+    # Remembered so subscribers can be notified once the transaction commits
+    session.info.setdefault('changed_events', set()).update(
+        row['event_id'] for row in rows if row['event_id'] is not None
+    )
+
+
+@event.listens_for(Session, 'before_commit')
+def insert_changes(session):
+    """
+    Inserts the transaction's buffered changes right before it commits.
+
+    A change's cursor is its SERIAL id, assigned on insert. If ids were
+    assigned on write, a transaction could take id N and commit after
+    another one committed N+1, and a consumer already past N+1 would never
+    see N. On Postgres the inserts take a transaction-level advisory lock,
+    released only once the commit is visible, so ids are assigned in commit
+    order. SQLite serializes writing transactions by itself.
+
+    The lock is only taken by transactions that logged changes, but those
+    commit one at a time: the lock is held through the commit's WAL flush,
+    so they cannot share flushes with group commit, and their throughput is
+    bounded by the commit latency (a few hundred to a few thousand commits a
+    second, depending on the disk). Transactions without changes, such as
+    job progress or idempotency keys, are not affected.
+    """
+    # Log the changes of objects still pending flush as well
+    session.flush()
+    rows = session.info.pop('pending_changes', None)
+    if not rows:
+        return
+    connection = session.connection()
+    if connection.dialect.name == 'postgresql':
+        connection.execute(select(func.pg_advisory_xact_lock(CHANGE_LOG_LOCK)))
+    connection.execute(insert(Change), rows)
+
+
+@event.listens_for(Session, 'after_rollback')
+def discard_changes(session):
+    session.info.pop('pending_changes', None)
+
+
+def _change_data(obj):
+    data = {}
+    for column in obj.__table__.columns:
+        value = getattr(obj, column.key)
+        data[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
+
+@event.listens_for(Session, 'after_flush')
+def record_changes(session, flush_context):
+    """
+    Logs flushed Event and Schedule changes to the change log on the flush's
+    own connection, so they commit or roll back with the model methods.
+    """
+    rows = []
+    for op, objects in (('insert', session.new), ('update', session.dirty), ('delete', session.deleted)):
+        for obj in objects:
+            if not isinstance(obj, (Event, Schedule)):
+                continue
+            if op == 'update' and not session.is_modified(obj, include_collections=False):
+                continue
+            entity = 'event' if isinstance(obj, Event) else 'schedule'
+            event_id = obj.id if isinstance(obj, Event) else obj.event_id
+            data = _change_data(obj) if op != 'delete' else None
+            rows.append(Change.row(entity, obj.id, op, event_id, data))
+    if rows:
+        write_changes(session, rows)
+
+
+# On Postgres every logged change notifies the listeners of its event, across
+# all workers; see flaskr/stream.py.
+CHANGE_NOTIFY_DDL = [
+    "CREATE OR REPLACE FUNCTION notify_event_change() RETURNS trigger AS $$ "
+    "BEGIN "
+    "IF NEW.event_id IS NOT NULL THEN PERFORM pg_notify('event_changes', NEW.event_id::text); END IF; "
+    "RETURN NEW; "
+    "END; $$ LANGUAGE plpgsql",
+    "CREATE TRIGGER changes_notify AFTER INSERT ON changes FOR EACH ROW EXECUTE FUNCTION notify_event_change()",
+]
+
+for statement in CHANGE_NOTIFY_DDL:
+    event.listen(Change.__table__, 'after_create', DDL(statement).execute_if(dialect='postgresql'))
+
+
+class OrganizerStats(db.Model):
+    """
+    Monthly rollup of an organizer's events.
+
+    event_count is kept exact on every event write by the flush listener
+    below. The schedule and registration totals are summed from the events'
+    denormalized counters by refresh(), run periodically with
+    'flask --app manage refresh-stats', so registrations never contend on
+    rollup rows.
+    """
+    __tablename__ = 'organizer_stats'
+    organizer_id = Column(Integer, primary_key=True)
+    month = Column(Date, primary_key=True)
+    event_count = Column(Integer, nullable=False, default=0)
+    schedule_count = Column(Integer, nullable=False, default=0)
+    attendee_count = Column(Integer, nullable=False, default=0)
+    refreshed_at = Column(DateTime, nullable=True)
+
+    @staticmethod
+    def refresh():
+        """
+        Rebuilds the rollup from the events and archived events tables in
+        one transaction.
+
+        Returns:
+            int: Number of (organizer, month) rows written.
+        """
+        columns = ('organizer_id', 'date', 'schedule_count', 'attendee_count')
+        all_events = union_all(
+            select(*(Event.__table__.c[name] for name in columns)),
+            select(*(events_archive.c[name] for name in columns))
+        ).subquery()
+        month = month_of(all_events.c.date)
+        totals = (select(
+                      all_events.c.organizer_id,
+                      month,
+                      func.count(),
+                      func.sum(all_events.c.schedule_count),
+                      func.sum(all_events.c.attendee_count),
+                      func.now()
+                  )
+                  .group_by(all_events.c.organizer_id, month))
+        db.session.execute(delete(OrganizerStats))
+        result = db.session.execute(
+            insert(OrganizerStats).from_select(
+                ['organizer_id', 'month', 'event_count', 'schedule_count', 'attendee_count', 'refreshed_at'],
+                totals
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+
+    def format(self):
+        return {
+            'month': self.month.strftime('%Y-%m'),
+            'events': self.event_count,
+            'schedules': self.schedule_count,
+            'registrations': self.attendee_count,
+            'schedules_per_event': round(self.schedule_count / self.event_count, 2) if self.event_count else 0,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+@event.listens_for(Session, 'before_flush')
+def update_organizer_stats(session, flush_context, instances):
+    """
+    Moves pending event inserts, deletes and date/organizer changes into the
+    monthly rollup, in the same transaction as the event write.
+    """
+    deltas = {}
+
+    def shift(organizer_id, when, delta):
+        if organizer_id is None or when is None:
+            return
+        key = (organizer_id, date(when.year, when.month, 1))
+        deltas[key] = deltas.get(key, 0) + delta
+
+    def previous(obj, key):
+        history = attributes.get_history(obj, key)
+        return (history.deleted or history.unchanged or [None])[0]
+
+    for obj in session.new:
+        if isinstance(obj, Event):
+            shift(obj.organizer_id, obj.date, 1)
+    for obj in session.deleted:
+        if isinstance(obj, Event):
+            shift(obj.organizer_id, obj.date, -1)
+    for obj in session.dirty:
+        if not isinstance(obj, Event) or obj in session.deleted:
+            continue
+        organizer = attributes.get_history(obj, 'organizer_id')
+        when = attributes.get_history(obj, 'date')
+        if not (organizer.has_changes() or when.has_changes()):
+            continue
+        shift(previous(obj, 'organizer_id'), previous(obj, 'date'), -1)
+        shift(obj.organizer_id, obj.date, 1)
+
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    connection = session.connection()
+    table = OrganizerStats.__table__
+    for (organizer_id, month), delta in deltas.items():
+        connection.execute(upsert(
+            connection.dialect.name,
+            table,
+            {'organizer_id': organizer_id, 'month': month, 'event_count': delta,
+             'schedule_count': 0, 'attendee_count': 0},
+            ['organizer_id', 'month'],
+            lambda excluded: {'event_count': table.c.event_count + excluded.event_count}
+        ))
+
+
+# Archive of past events. archive_events() moves old events with their
+# schedules and attendance links out of the hot tables in chunks; the archive
+# stays readable through GET /events/<id>?archived=true.
+events_archive = Table(
+    'events_archive',
+    db.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('name', String, nullable=False),
+    Column('description', String, nullable=True),
+    Column('date', DateTime, nullable=False),
+    Column('organizer_id', Integer, nullable=False),
+    Column('capacity', Integer, nullable=True),
+    Column('attendee_count', Integer, nullable=False),
+    Column('schedule_count', Integer, nullable=False),
+    Column('archived_at', DateTime, nullable=False)
+)
+
+# Partitioned by month on Postgres; the hot schedules table cannot be, since
+# its overlap exclusion constraint does not include the partition key.
+schedules_archive = Table(
+    'schedules_archive',
+    db.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('title', String, nullable=False),
+    Column('start_time', DateTime, primary_key=True),
+    Column('end_time', DateTime, nullable=False),
+    Column('event_id', Integer, nullable=False),
+    Index('ix_schedules_archive_event_id', 'event_id'),
+    postgresql_partition_by='RANGE (start_time)'
+)
+
+attendances_archive = Table(
+    'attendances_archive',
+    db.metadata,
+    Column('attendee_id', Integer, primary_key=True),
+    Column('event_id', Integer, primary_key=True),
+    Index('ix_attendances_archive_event_id', 'event_id')
+)
+
+event.listen(
+    schedules_archive, 'after_create',
+    DDL("CREATE TABLE schedules_archive_default PARTITION OF schedules_archive DEFAULT").execute_if(dialect='postgresql')
+)
+
+
+def ensure_schedule_partitions(connection, event_ids):
+    """Creates the monthly schedules_archive partitions the given events' schedules fall into."""
+    months = connection.execute(
+        select(month_of(Schedule.start_time)).where(Schedule.event_id.in_(event_ids)).distinct()
+    ).scalars()
+    for month in months:
+        end = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS schedules_archive_{month:%Y_%m} PARTITION OF schedules_archive "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{end:%Y-%m-%d}')"
+        ))
+
+
+def archive_events(before, chunk_size=500):
+    """
+    Moves events dated before the given datetime, with their schedules,
+    attendance links and waitlists, to the archive tables.
+
+    Works in chunks of chunk_size events, each committed on its own, so it
+    can be interrupted and resumed without holding long locks. Every
+    archived event, schedule and attendance link gets an 'archive'
+    tombstone in the change log.
+
+    Returns:
+        int: Number of events archived.
+    """
+    archived = 0
+    while True:
+        ids = db.session.execute(
+            select(Event.id).where(Event.date < before).order_by(Event.date, Event.id).limit(chunk_size)
+        ).scalars().all()
+        if not ids:
+            return archived
+
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql':
+            ensure_schedule_partitions(connection, ids)
+        now = datetime.utcnow()
+
+        event_columns = [c.name for c in events_archive.c if c.name != 'archived_at']
+        db.session.execute(events_archive.insert().from_select(
+            event_columns + ['archived_at'],
+            select(*(Event.__table__.c[name] for name in event_columns), literal(now)).where(Event.id.in_(ids))
+        ))
+        schedule_columns = [c.name for c in schedules_archive.c]
+        db.session.execute(schedules_archive.insert().from_select(
+            schedule_columns,
+            select(*(Schedule.__table__.c[name] for name in schedule_columns)).where(Schedule.event_id.in_(ids))
+        ))
+        db.session.execute(attendances_archive.insert().from_select(
+            ['attendee_id', 'event_id'],
+            select(attendances.c.attendee_id, attendances.c.event_id).where(attendances.c.event_id.in_(ids))
+        ))
+
+        db.session.execute(delete(WaitlistEntry).where(WaitlistEntry.event_id.in_(ids)))
+        links = db.session.execute(
+            delete(attendances).where(attendances.c.event_id.in_(ids))
+            .returning(attendances.c.attendee_id, attendances.c.event_id)
+        ).all()
+        schedules = db.session.execute(
+            delete(Schedule.__table__).where(Schedule.__table__.c.event_id.in_(ids))
+            .returning(Schedule.__table__.c.id, Schedule.__table__.c.event_id)
+        ).all()
+        db.session.execute(delete(Event).where(Event.id.in_(ids)))
+        rows = [Change.row('attendance', link.attendee_id, 'archive', link.event_id,
+                           {'attendee_id': link.attendee_id, 'event_id': link.event_id})
+                for link in links]
+        rows.extend(Change.row('schedule', s.id, 'archive', s.event_id) for s in schedules)
+        rows.extend(Change.row('event', event_id, 'archive', event_id) for event_id in ids)
+        write_changes(db.session(), rows)
+        db.session.commit()
+        archived += len(ids)
+
+
+def load_archived_event(event_id):
+    """
+    Reads an archived event with its schedules and attendees.
+
+    Returns:
+        dict: Event details in the shape of GET /events/<id>, or None.
+    """
+    row = db.session.execute(select(events_archive).where(events_archive.c.id == event_id)).first()
+    if row is None:
+        return None
+    schedules = db.session.execute(
+        select(schedules_archive)
+        .where(schedules_archive.c.event_id == event_id)
+        .order_by(schedules_archive.c.start_time)
+    ).all()
+    attendees = (Attendee.query
+                 .join(attendances_archive, attendances_archive.c.attendee_id == Attendee.id)
+                 .filter(attendances_archive.c.event_id == event_id)
+                 .order_by(Attendee.id)
+                 .all())
+    return {
+        'id': row.id,
+        'name': row.name,
+        'description': row.description,
+        'date': row.date.isoformat(),
+        'capacity': row.capacity,
+        'attendee_count': row.attendee_count,
+        'schedule_count': row.schedule_count,
+        'archived_at': row.archived_at.isoformat(),
+        'attendees': [a.format() for a in attendees],
+        'schedules': [{'id': s.id, 'title': s.title, 'start_time': s.start_time.isoformat(),
+                       'end_time': s.end_time.isoformat()} for s in schedules]
+    }
+
+
+class Job(db.Model):
+    """
+    A background job, run in chunks by flaskr/jobs.py.
+
+    Each chunk of work commits together with the job's progress, so a job
+    interrupted by a worker restart resumes from its last committed chunk.
+    updated_at is refreshed after every chunk; a running job whose
+    updated_at is older than the stale timeout is considered orphaned and
+    can be claimed by another worker.
+    """
+    __tablename__ = 'jobs'
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    # 'pending', 'running', 'succeeded' or 'failed'
+    status = Column(String, nullable=False, default='pending')
+    params = Column(db.JSON, nullable=False)
+    progress = Column(Integer, nullable=False, default=0)
+    total = Column(Integer, nullable=True)
+    result = Column(db.JSON, nullable=True)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    # Serves the lookup of pending and orphaned jobs
+    __table_args__ = (
+        Index('ix_jobs_status_updated_at', 'status', 'updated_at'),
+    )
+
+    def insert(self):
+        db.session.add(self)
+        db.session.commit()
+
+    @staticmethod
+    def claim(job_id, stale_before):
+        """
+        Atomically takes a pending or orphaned job with a conditional UPDATE.
+
+        Returns:
+            bool: True if this caller now runs the job.
+        """
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id)
+            .where(or_(Job.status == 'pending', (Job.status == 'running') & (Job.updated_at < stale_before)))
+            .values(status='running', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    @staticmethod
+    def claimable(stale_before):
+        return db.session.execute(
+            select(Job.id)
+            .where(or_(Job.status == 'pending', (Job.status == 'running') & (Job.updated_at < stale_before)))
+            .order_by(Job.id)
+        ).scalars().all()
+
+    def format(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': self.progress,
+            'total': self.total,
+            'result': self.result,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'updated_at': self.updated_at.isoformat()
+        }
+
+
+class IdempotencyKey(db.Model):
+    """
+    Outcome of a POST request sent with an Idempotency-Key header, replayed
+    to retries of the request; see flaskr/idempotency.py.
+
+    The key is a SHA-256 digest of the caller, the request path and the
+    client's key, and request_hash a SHA-256 digest of the request body it
+    was first used with. A row without a status_code is a request in
+    progress.
+    """
+    __tablename__ = 'idempotency_keys'
+    key = Column(String(64), primary_key=True)
+    request_hash = Column(String(64), nullable=True)
+    status_code = Column(Integer, nullable=True)
+    body = Column(db.Text, nullable=True)
+    location = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+
+    @staticmethod
+    def acquire(key, request_hash, stale_before):
+        """
+        Reserves a key for a request, or takes over a reservation abandoned
+        before stale_before.
+
+        Returns:
+            bool: True if this request now owns the key.
+        """
+        dialect_name = db.session.get_bind().dialect.name
+        values = {'key': key, 'request_hash': request_hash, 'created_at': datetime.utcnow()}
+        acquired = db.session.execute(insert_ignore(dialect_name, IdempotencyKey.__table__, values)).rowcount == 1
+        if not acquired:
+            acquired = db.session.execute(
+                update(IdempotencyKey)
+                .where(IdempotencyKey.key == key,
+                       IdempotencyKey.status_code.is_(None),
+                       IdempotencyKey.created_at < stale_before)
+                .values(request_hash=request_hash, created_at=values['created_at'])
+                .execution_options(synchronize_session=False)
+            ).rowcount == 1
+        db.session.commit()
+        return acquired
+
+    @staticmethod
+    def complete(key, status_code, body, location):
+        db.session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(status_code=status_code, body=body, location=location)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def release(key):
+        db.session.rollback()
+        db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+        db.session.commit()
+
+    @staticmethod
+    def purge(before):
+        result = db.session.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < before))
+        db.session.commit()
+        return result.rowcount
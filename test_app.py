@@ -1,9 +1,13 @@
 import os
 import unittest
 import json
+import threading
+import time
+from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
-from flaskr import create_app
-from models import db, Event, Attendee, Schedule
+from flaskr import create_app, event_snapshot
+from auth.ratelimit import limiter
+from models import db, Event, Attendee, Schedule, WaitlistEntry, Change, OrganizerStats, Job, IdempotencyKey, archive_events, attendances, events_archive, schedules_archive, attendances_archive
 
 class EventManagementTestCase(unittest.TestCase):
     def setUp(self):
@@ -65,10 +69,21 @@ class EventManagementTestCase(unittest.TestCase):
     def tearDown(self):
         """Executed after each test to clean up test data."""
         with self.app.app_context():
+            db.session.query(IdempotencyKey).delete()
+            db.session.query(Job).delete()
+            db.session.query(OrganizerStats).delete()
+            db.session.query(Change).delete()
+            db.session.query(WaitlistEntry).delete()
+            db.session.execute(attendances.delete())
+            db.session.execute(attendances_archive.delete())
+            db.session.execute(schedules_archive.delete())
+            db.session.execute(events_archive.delete())
             db.session.query(Attendee).delete()
             db.session.query(Schedule).delete()
             db.session.query(Event).delete()
             db.session.commit()
+        limiter.reset()
+        event_snapshot.reset()
     # TEST CASES
 
     # Success behavior tests
@@ -155,6 +170,641 @@ class EventManagementTestCase(unittest.TestCase):
         self.assertTrue(data['success'])
         self.assertEqual(data['schedule']['title'], self.schedule_data["title"])
 
+    def test_get_events_date_range_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        self.client().post('/events', json=self.event_data_1, headers=header_obj)
+
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events?from=2025-03-25&to=2025-03-26', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual([e['name'] for e in data['events']], [self.event_data_1["name"]])
+
+    def test_get_upcoming_events_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = {
+            "name": "Future Summit",
+            "date": "2099-01-01T09:00:00",
+            "organizer_id": 1
+        }
+        self.client().post('/events', json=event_data, headers=header_obj)
+
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events/upcoming', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertIn(event_data["name"], [e['name'] for e in data['events']])
+
+    def test_get_event_calendar_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        self.client().post('/events', json=self.event_data_1, headers=header_obj)
+
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events/calendar?from=2025-03-25&to=2025-03-26', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['days'], [{"date": "2025-03-25", "count": 1}])
+
+    def test_search_events_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = {
+            "name": "Quantum Meetup",
+            "description": "Talks on quantum computing",
+            "date": "2025-05-01T18:00:00",
+            "organizer_id": 1
+        }
+        self.client().post('/events', json=event_data, headers=header_obj)
+
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events/search?q=quantum', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['events'][0]['name'], event_data["name"])
+
+    def test_get_schedule_conflicts_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+
+        res = self.client().get(f'/events/{event_id}/schedule/conflicts', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['conflicts'], [])
+
+        # Rows predating the overlap checks, inserted directly; Postgres
+        # rejects them through its exclusion constraint
+        with self.app.app_context():
+            if db.engine.dialect.name == 'postgresql':
+                return
+            slots = [("Panel", "2025-03-15T10:00:00", "2025-03-15T11:30:00"),
+                     ("Workshop", "2025-03-15T11:00:00", "2025-03-15T12:00:00"),
+                     ("Lunch", "2025-03-15T12:00:00", "2025-03-15T13:00:00")]
+            schedules = [Schedule(title=title, start_time=datetime.fromisoformat(start),
+                                  end_time=datetime.fromisoformat(end), event_id=event_id)
+                         for title, start, end in slots]
+            db.session.add_all(schedules)
+            db.session.commit()
+            keynote = Schedule.query.filter_by(event_id=event_id, title="Keynote Speech").one().id
+            panel, workshop, lunch = (s.id for s in schedules)
+
+        res = self.client().get(f'/events/{event_id}/schedule/conflicts', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['conflicts'], [
+            {'schedules': [keynote, panel], 'overlap_start': '2025-03-15T10:00:00',
+             'overlap_end': '2025-03-15T10:30:00'},
+            {'schedules': [panel, workshop], 'overlap_start': '2025-03-15T11:00:00',
+             'overlap_end': '2025-03-15T11:30:00'}
+        ])
+
+    def test_add_attendee_waitlist_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, capacity=1)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        res = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        first_id = json.loads(res.data)['attendee']['id']
+        res = self.client().post(f'/events/{event_id}/attendees',
+                                 json=dict(self.attendee_data_1, waitlist=True), headers=header_obj)
+        data = json.loads(res.data)
+        waitlisted_id = data['attendee']['id']
+
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(data['waitlist']['position'], 1)
+
+        # Unregistering the first attendee promotes the waitlisted one
+        res = self.client().delete(f'/events/{event_id}/attendees/{first_id}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['promoted'], waitlisted_id)
+
+    def test_update_event_capacity_promotes_waitlist_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, capacity=1)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        res = self.client().post(f'/events/{event_id}/attendees',
+                                 json=dict(self.attendee_data_1, waitlist=True), headers=header_obj)
+        waitlisted_id = json.loads(res.data)['attendee']['id']
+
+        # The added seat goes to the waitlist before any new registrant
+        res = self.client().patch(f'/events/{event_id}', json={"capacity": 2}, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['promoted'], [waitlisted_id])
+        self.assertEqual(data['event']['attendee_count'], 2)
+        with self.app.app_context():
+            self.assertEqual(WaitlistEntry.query.filter_by(event_id=event_id).count(), 0)
+
+    def test_add_attendee_concurrent_no_oversell(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, capacity=5)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        status_codes = []
+
+        def register(i):
+            res = self.app.test_client().post(f'/events/{event_id}/attendees',
+                                              json={"name": f"Guest {i}", "email": f"guest{i}@example.com"},
+                                              headers=header_obj)
+            status_codes.append(res.status_code)
+
+        threads = [threading.Thread(target=register, args=(i,)) for i in range(40)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(status_codes.count(201), 5)
+        self.assertEqual(status_codes.count(409), 35)
+        with self.app.app_context():
+            event = Event.query.get(event_id)
+            self.assertEqual(event.attendee_count, 5)
+            self.assertEqual(len(event.attendees), 5)
+
+    def test_get_events_counts_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        res = self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+        schedule_id = json.loads(res.data)['schedule']['id']
+
+        res = self.client().get('/events', headers=header_obj)
+        data = json.loads(res.data)
+        event = next(e for e in data['events'] if e['id'] == event_id)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(event['attendee_count'], 1)
+        self.assertEqual(event['schedule_count'], 1)
+
+        res = self.client().delete(f'/events/{event_id}/schedule/{schedule_id}', headers=header_obj)
+        self.assertEqual(res.status_code, 200)
+
+        res = self.client().get('/events', headers=header_obj)
+        data = json.loads(res.data)
+        event = next(e for e in data['events'] if e['id'] == event_id)
+
+        self.assertEqual(event['schedule_count'], 0)
+
+    def test_get_changes_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().get('/changes?limit=1000', headers=header_obj)
+        cursor = json.loads(res.data)['next_cursor']
+
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().delete(f'/events/{event_id}', headers=header_obj)
+
+        res = self.client().get(f'/changes?since={cursor}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual([(c['entity'], c['entity_id'], c['op']) for c in data['changes']],
+                         [('event', event_id, 'insert'), ('event', event_id, 'delete')])
+        self.assertIsNone(data['changes'][-1]['data'])
+
+    def test_get_changes_commit_order_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        with self.app.app_context():
+            if db.engine.dialect.name != 'postgresql':
+                self.skipTest("SQLite blocks the second writer")
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        res = self.client().get('/changes?limit=1000', headers=header_obj)
+        cursor = json.loads(res.data)['next_cursor']
+
+        flushed = threading.Event()
+        release = threading.Event()
+
+        def add_schedule_slowly():
+            # Writes a schedule, and its change, but commits last
+            with self.app.app_context():
+                db.session.add(Schedule(title="Late slot", start_time=datetime(2025, 3, 25, 21),
+                                        end_time=datetime(2025, 3, 25, 22), event_id=event_id))
+                db.session.flush()
+                flushed.set()
+                release.wait(10)
+                db.session.commit()
+
+        writer = threading.Thread(target=add_schedule_slowly)
+        writer.start()
+        flushed.wait(10)
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        res = self.client().get(f'/changes?since={cursor}', headers=header_obj)
+        data = json.loads(res.data)
+        release.set()
+        writer.join()
+
+        self.assertEqual([c['entity'] for c in data['changes']], ['attendance'])
+
+        # The late commit gets a cursor after the changes already read
+        res = self.client().get(f"/changes?since={data['next_cursor']}", headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual([(c['entity'], c['op']) for c in data['changes']], [('schedule', 'insert')])
+
+    def test_stream_event_resume_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        # Resuming from cursor 0 replays the event's creation first
+        res = self.client().get(f'/events/{event_id}/stream',
+                                headers=dict(header_obj, **{"Last-Event-ID": "0"}), buffered=False)
+        message = next(res.response).decode()
+        res.close()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'text/event-stream')
+        self.assertIn('event: event', message)
+        self.assertIn('"op": "insert"', message)
+
+    def test_get_events_by_ids_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+
+        res = self.client().get(f'/events?ids=999999,{event_id}&include=schedules', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['events'][0], {"id": 999999, "error": 404})
+        self.assertEqual(data['events'][1]['id'], event_id)
+        self.assertEqual(len(data['events'][1]['schedules']), 1)
+
+        res = self.client().post('/events/batch', json={"ids": [event_id]}, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['events'][0]['name'], self.event_data_1["name"])
+
+    def test_get_attendee_events_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        res = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        attendee_id = json.loads(res.data)['attendee']['id']
+
+        res = self.client().get(f'/attendees?email={self.attendee_data["email"]}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([a['id'] for a in data['attendees']], [attendee_id])
+
+        res = self.client().get(f'/attendees/{attendee_id}/events', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['events'][0]['id'], event_id)
+
+    def test_get_organizer_stats_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, organizer_id=424242)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+
+        res = self.client().get('/organizers/424242/stats', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([(m['month'], m['events']) for m in data['months']], [("2025-03", 1)])
+        self.assertEqual(data['events'][0]['id'], event_id)
+        self.assertEqual(data['events'][0]['registrations'], 1)
+
+    def test_get_archived_event_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = {
+            "name": "Millennium Gala",
+            "date": "2000-01-01T20:00:00",
+            "organizer_id": 1
+        }
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+
+        with self.app.app_context():
+            self.assertGreaterEqual(archive_events(datetime(2001, 1, 1)), 1)
+
+        res = self.client().get(f'/events/{event_id}', headers=header_obj)
+        self.assertEqual(res.status_code, 404)
+
+        res = self.client().get(f'/events/{event_id}?archived=true', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['event']['name'], event_data["name"])
+        self.assertEqual(len(data['event']['attendees']), 1)
+
+        res = self.client().get('/changes?limit=1000', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual([(c['entity'], c['op']) for c in data['changes'] if c['event_id'] == event_id][-2:],
+                         [('attendance', 'archive'), ('event', 'archive')])
+
+    def test_get_event_calendar_feed_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+
+        res = self.client().get(f'/events/{event_id}/calendar.ics', headers=header_obj)
+        body = res.get_data(as_text=True)
+        etag = res.headers['ETag']
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'text/calendar')
+        self.assertEqual(body.count('BEGIN:VEVENT'), 1)
+        self.assertIn(f"SUMMARY:{self.schedule_data['title']}", body)
+
+        # Unchanged feeds are not sent again
+        res = self.client().get(f'/events/{event_id}/calendar.ics', headers={**header_obj, "If-None-Match": etag})
+        self.assertEqual(res.status_code, 304)
+
+        schedule_data = {
+            "title": "Closing Remarks",
+            "start_time": "2025-03-15T17:00:00",
+            "end_time": "2025-03-15T17:30:00"
+        }
+        self.client().post(f'/events/{event_id}/schedule', json=schedule_data, headers=header_obj)
+        res = self.client().get(f'/events/{event_id}/calendar.ics', headers={**header_obj, "If-None-Match": etag})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.get_data(as_text=True).count('BEGIN:VEVENT'), 2)
+
+    def test_delete_event_with_schedule_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        res = self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+        schedule_id = json.loads(res.data)['schedule']['id']
+        res = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        attendee_id = json.loads(res.data)['attendee']['id']
+        res = self.client().get('/changes?limit=1000', headers=header_obj)
+        cursor = json.loads(res.data)['next_cursor']
+
+        res = self.client().delete(f'/events/{event_id}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['deleted'], event_id)
+        with self.app.app_context():
+            self.assertEqual(Schedule.query.filter_by(event_id=event_id).count(), 0)
+
+        # The cascaded deletes are logged before the event's tombstone
+        res = self.client().get(f'/changes?since={cursor}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual([(c['entity'], c['entity_id'], c['op']) for c in data['changes']],
+                         [('attendance', attendee_id, 'delete'), ('schedule', schedule_id, 'delete'),
+                          ('event', event_id, 'delete')])
+
+    def test_import_attendees_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = {**self.event_data, "capacity": 2}
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        attendees = [{"name": f"Guest {i}", "email": f"guest{i}@example.com"} for i in range(3)]
+
+        res = self.client().post(f'/events/{event_id}/attendees/import',
+                                 json={"attendees": attendees, "waitlist": True}, headers=header_obj)
+        data = json.loads(res.data)
+
+        job_url = f"/jobs/{data['job']['id']}"
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(res.headers['Location'], job_url)
+
+        for _ in range(50):
+            res = self.client().get(job_url, headers=header_obj)
+            job = json.loads(res.data)['job']
+            if job['status'] in ('succeeded', 'failed'):
+                break
+            time.sleep(0.1)
+
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertEqual(job['progress'], 3)
+        self.assertEqual(job['result']['registered'], 2)
+        self.assertEqual(job['result']['waitlisted'], 1)
+
+    def test_register_many_skips_registered_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = {**self.event_data, "capacity": 3}
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        people = [self.attendee_data] + [{"name": f"Guest {i}", "email": f"guest{i}@example.com"}
+                                         for i in (0, 1, 1, 2)]
+
+        with self.app.app_context():
+            counts = Event.register_many(event_id, people, waitlist=True)
+            db.session.commit()
+            attendee_count = db.session.get(Event, event_id).attendee_count
+
+        self.assertEqual(counts, {'registered': 2, 'waitlisted': 1, 'full': 0, 'skipped': 2})
+        self.assertEqual(attendee_count, 3)
+
+    def test_add_attendee_twice_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        first = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        second = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        res = self.client().get(f'/events/{event_id}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(json.loads(second.data)['attendee']['id'], json.loads(first.data)['attendee']['id'])
+        self.assertEqual(data['event']['attendee_count'], 1)
+
+    def test_add_attendee_waitlisted_twice_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, capacity=2)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        res = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        first_id = json.loads(res.data)['attendee']['id']
+        res = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data_1, headers=header_obj)
+        seated_id = json.loads(res.data)['attendee']['id']
+        # A stale waitlist entry of a seated attendee, first in line
+        with self.app.app_context():
+            db.session.add(WaitlistEntry(event_id=event_id, attendee_id=seated_id))
+            db.session.commit()
+
+        waitlisted = {"name": "Jane Roe", "email": "jane@example.com", "waitlist": True}
+        self.client().post(f'/events/{event_id}/attendees', json=waitlisted, headers=header_obj)
+        # Registering again keeps the attendee on the waitlist instead of seating them
+        res = self.client().post(f'/events/{event_id}/attendees', json=waitlisted, headers=header_obj)
+        data = json.loads(res.data)
+        waitlisted_id = data['attendee']['id']
+
+        self.assertEqual(res.status_code, 202)
+        self.assertEqual(data['waitlist']['position'], 2)
+
+        # The freed seat skips the stale entry and goes to the next attendee in line
+        res = self.client().delete(f'/events/{event_id}/attendees/{first_id}', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['promoted'], waitlisted_id)
+        res = self.client().get(f'/events/{event_id}', headers=header_obj)
+        data = json.loads(res.data)
+        self.assertEqual(data['event']['attendee_count'], 2)
+        self.assertEqual(sorted(a['id'] for a in data['event']['attendees']), sorted([seated_id, waitlisted_id]))
+
+    def test_create_event_idempotency_key_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"],
+            "Idempotency-Key": "create-event-test"
+        }
+        first = self.client().post('/events', json=self.event_data, headers=header_obj)
+        second = self.client().post('/events', json=self.event_data, headers=header_obj)
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(json.loads(second.data), json.loads(first.data))
+
+    def test_get_day_schedule_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+
+        res = self.client().get('/schedule?date=2025-03-15', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['total'], 1)
+        self.assertEqual(data['schedules'][0]['event_name'], self.event_data['name'])
+        self.assertEqual(len(data['occupancy']), 24)
+        self.assertEqual(data['occupancy'][9], 1)
+        self.assertEqual(data['occupancy'][10], 1)
+        self.assertEqual(sum(data['occupancy']), 2)
+
+        # A session running past midnight belongs to both days
+        night = {"title": "Hackathon", "start_time": "2025-03-15T22:00:00", "end_time": "2025-03-16T02:00:00"}
+        self.client().post(f'/events/{event_id}/schedule', json=night, headers=header_obj)
+        res = self.client().get('/schedule?date=2025-03-16', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([s['title'] for s in data['schedules']], ["Hackathon"])
+        self.assertEqual(data['occupancy'][:3], [1, 1, 0])
+        self.assertEqual(sum(data['occupancy']), 2)
+
+    def test_get_events_page_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        self.client().post('/events', json=self.event_data, headers=header_obj)
+        # Builds the snapshot, which must then pick up the next event
+        self.client().get('/events', headers=header_obj)
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        res = self.client().get('/events?page=1', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['page'], 1)
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['events'][-1]['id'], event_id)
+        self.assertEqual(data['events'][-1]['name'], self.event_data_1['name'])
+
+    def test_get_events_page_past_last_success(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        self.client().post('/events', json=self.event_data, headers=header_obj)
+
+        res = self.client().get('/events?page=1000', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['events'], [])
+        self.assertEqual(data['total'], 1)
+        self.assertNotIn(1000, event_snapshot.pages)
+
     # Error behavior tests
 
     def test_get_events_fail_401(self):
@@ -199,6 +849,200 @@ class EventManagementTestCase(unittest.TestCase):
         self.assertEqual(res.status_code, 404)
         self.assertFalse(data['success'])
 
+    def test_get_events_invalid_date_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events?from=not-a-date', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_get_events_by_ids_out_of_range_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events?ids=1,99999999999999999999999', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_get_upcoming_events_days_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events/upcoming?days=3000000', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_get_changes_since_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().get('/changes?since=9223372036854775808', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_get_attendees_page_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        for page in (0, 2 ** 62):
+            res = self.client().get(f'/attendees?page={page}', headers=header_obj)
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 400)
+            self.assertFalse(data['success'])
+
+    def test_get_day_schedule_organizer_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/schedule?date=2025-03-15&organizer_id=2147483648', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_search_events_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/events/search', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_add_schedule_overlap_fail_409(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+        self.client().post(f'/events/{event_id}/schedule', json=self.schedule_data, headers=header_obj)
+
+        overlapping = {
+            "title": "Panel",
+            "start_time": "2025-03-15T10:00:00",
+            "end_time": "2025-03-15T11:00:00"
+        }
+        res = self.client().post(f'/events/{event_id}/schedule', json=overlapping, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 409)
+        self.assertFalse(data['success'])
+
+    def test_add_schedule_inverted_fail_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        res = self.client().post('/events', json=self.event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        inverted = {
+            "title": "Panel",
+            "start_time": "2025-03-15T11:00:00",
+            "end_time": "2025-03-15T10:00:00"
+        }
+        res = self.client().post(f'/events/{event_id}/schedule', json=inverted, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_add_attendee_full_fail_409(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, capacity=1)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        res = self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data_1, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 409)
+        self.assertFalse(data['success'])
+        self.assertEqual(data['message'], "Event is full")
+
+    def test_update_event_capacity_below_attendees_fail_409(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"]
+        }
+        event_data = dict(self.event_data_1, capacity=2)
+        res = self.client().post('/events', json=event_data, headers=header_obj)
+        event_id = json.loads(res.data)['event']['id']
+
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data, headers=header_obj)
+        self.client().post(f'/events/{event_id}/attendees', json=self.attendee_data_1, headers=header_obj)
+        res = self.client().patch(f'/events/{event_id}', json={"capacity": 1}, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 409)
+        self.assertFalse(data['success'])
+        with self.app.app_context():
+            self.assertEqual(Event.query.get(event_id).capacity, 2)
+
+    def test_get_attendee_events_fail_404(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/attendees/999999/events', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(data['success'])
+
+    def test_get_events_rate_limited_429(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        limits = limiter.limits
+        limiter.limits = {**limits, 'read:events': (1, 2)}
+        try:
+            responses = [self.client().get('/events', headers=header_obj) for _ in range(3)]
+        finally:
+            limiter.limits = limits
+        res = responses[-1]
+        data = json.loads(res.data)
+
+        self.assertEqual([r.status_code for r in responses[:2]], [200, 200])
+        self.assertEqual(res.status_code, 429)
+        self.assertFalse(data['success'])
+        self.assertGreaterEqual(int(res.headers['Retry-After']), 1)
+
+    def test_get_day_schedule_invalid_date_400(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Attendee"]
+        }
+        res = self.client().get('/schedule?date=15-03-2025', headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(data['success'])
+
+    def test_create_event_idempotency_key_reused_fail_422(self):
+        header_obj = {
+            "Authorization": self.auth_headers["Admin"],
+            "Idempotency-Key": "create-event-test"
+        }
+        self.client().post('/events', json=self.event_data, headers=header_obj)
+        res = self.client().post('/events', json=self.event_data_1, headers=header_obj)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 422)
+        self.assertFalse(data['success'])
+        with self.app.app_context():
+            self.assertIsNone(Event.query.filter_by(name=self.event_data_1["name"]).first())
+
     # RBAC tests
 
     def test_admin_create_event(self):
@@ -0,0 +1,276 @@
+import os
+import unittest
+import json
+from datetime import datetime
+from sqlalchemy import event, text
+from flaskr import create_app, event_snapshot
+from auth.ratelimit import limiter
+from models import db, Event, Attendee, Schedule, WaitlistEntry, Change, OrganizerStats, Job, IdempotencyKey, attendances
+
+# Tables that must never be read with a sequential scan by a targeted query
+HOT_TABLES = {'events', 'schedules', 'attendances'}
+
+# Size of the dataset seeded for the query plan tests
+SEED_EVENTS = 20000
+SEED_SCHEDULES_PER_EVENT = 5
+SEED_ATTENDEES_PER_EVENT = 5
+
+# QueryRecorder
+# Captures the SQL statements run while a block of code executes.
+
+class QueryRecorder:
+    """
+    Records every statement executed on an engine, through SQLAlchemy's
+    cursor execution events.
+
+    Attributes:
+        statements (list): (statement, parameters) of each execution.
+        rows (int): Rows returned by the SELECT statements. Taken from the
+                    driver's rowcount when it reports one (psycopg2 does);
+                    otherwise (SQLite, server-side cursors) counted with a
+                    count(*) over the statement, run right away on the same
+                    connection and transaction.
+    """
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.rows = 0
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.listen(self.engine, 'after_cursor_execute', self.after_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self.before_cursor_execute)
+        event.remove(self.engine, 'after_cursor_execute', self.after_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append((statement, parameters, executemany))
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if not is_select(statement) or executemany:
+            return
+        if cursor.rowcount >= 0:
+            self.rows += cursor.rowcount
+            return
+        # A DBAPI cursor, so the count is not recorded as a statement itself
+        counter = cursor.connection.cursor()
+        try:
+            counter.execute(f'SELECT count(*) FROM ({statement}) AS counted', parameters)
+            self.rows += counter.fetchone()[0]
+        finally:
+            counter.close()
+
+    def selects(self):
+        return [(statement, parameters) for statement, parameters, executemany in self.statements
+                if is_select(statement) and not executemany]
+
+
+def is_select(statement):
+    return statement.lstrip().upper().startswith(('SELECT', 'WITH'))
+
+
+def seq_scans(plan):
+    """Yields the relations read by the Seq Scan nodes of an EXPLAIN (FORMAT JSON) plan."""
+    if plan.get('Node Type') == 'Seq Scan':
+        yield plan.get('Relation Name')
+    for child in plan.get('Plans', []):
+        yield from seq_scans(child)
+
+
+class QueryBudgetTestCase(unittest.TestCase):
+    """
+    Upper bounds on the statements each endpoint runs and the rows it
+    fetches, so that new lazy loads and N+1 queries fail the build.
+    """
+    # Statement and row budgets of each endpoint call; the URLs are filled
+    # in with the fixture's ids
+    BUDGETS = [
+        ('get', '/events', 2, 10),
+        # Served from the event snapshot, after checking the change log's head
+        ('get', '/events', 1, 1),
+        ('get', '/events?from=2030-01-01&to=2030-02-01', 1, 10),
+        ('get', '/events/{event_id}', 3, 10),
+        ('get', '/events?ids={event_id}&include=schedules,attendees', 3, 10),
+        ('get', '/events/upcoming?days=36500', 1, 10),
+        ('get', '/events/calendar?from=2030-01-01&to=2030-02-01&level=schedules', 1, 10),
+        ('get', '/events/search?q=Benchmark', 2, 10),
+        ('get', '/events/{event_id}/schedule/conflicts', 2, 10),
+        ('get', '/events/{event_id}/calendar.ics', 4, 10),
+        ('get', '/attendees?email=guest0@example.com', 2, 2),
+        ('get', '/attendees/{attendee_id}/events', 3, 10),
+        ('get', '/organizers/{organizer_id}/stats', 2, 10),
+        ('get', '/changes?since=0', 1, 20),
+        ('get', '/schedule?date=2030-01-15', 2, 30),
+        ('get', '/schedule?date=2030-01-15&organizer_id={organizer_id}', 2, 30),
+        # Includes the change log lock taken at commit on PostgreSQL
+        ('post', '/events/{event_id}/attendees', 7, 10),
+    ]
+
+    def setUp(self):
+        """Executed before each test."""
+        self.app = create_app()
+        self.client = self.app.test_client
+
+        with open('auth_config.json', 'r') as f:
+            self.auth = json.loads(f.read())
+        self.headers = {"Authorization": f'Bearer {self.auth["roles"]["Admin"]["jwt_token"]}'}
+
+        with self.app.app_context():
+            db.create_all()
+            event_obj = Event(name="Benchmark Summit", description="Query budget fixture",
+                              date=datetime(2030, 1, 15, 9), organizer_id=7, capacity=10)
+            event_obj.insert()
+            for hour in range(3):
+                Schedule(title=f"Session {hour}", event_id=event_obj.id,
+                         start_time=datetime(2030, 1, 15, 9 + hour),
+                         end_time=datetime(2030, 1, 15, 10 + hour)).insert()
+            for i in range(3):
+                status, attendee_id = event_obj.register(f"Guest {i}", f"guest{i}@example.com")
+            OrganizerStats.refresh()
+            self.ids = {'event_id': event_obj.id, 'attendee_id': attendee_id, 'organizer_id': 7}
+
+    def tearDown(self):
+        """Executed after each test to clean up test data."""
+        with self.app.app_context():
+            db.session.query(IdempotencyKey).delete()
+            db.session.query(Job).delete()
+            db.session.query(OrganizerStats).delete()
+            db.session.query(Change).delete()
+            db.session.query(WaitlistEntry).delete()
+            db.session.execute(attendances.delete())
+            db.session.query(Attendee).delete()
+            db.session.query(Schedule).delete()
+            db.session.query(Event).delete()
+            db.session.commit()
+        limiter.reset()
+        event_snapshot.reset()
+
+    def test_endpoint_query_budgets(self):
+        for method, url, max_statements, max_rows in self.BUDGETS:
+            url = url.format(**self.ids)
+            with self.subTest(method=method, url=url):
+                with self.app.app_context():
+                    with QueryRecorder(db.engine) as recorder:
+                        if method == 'post':
+                            res = self.client().post(url, json={"name": "New Guest", "email": "new@example.com"},
+                                                     headers=self.headers)
+                        else:
+                            res = self.client().get(url, headers=self.headers)
+                        # Streamed responses run their queries while the body is read
+                        res.get_data()
+
+                self.assertLess(res.status_code, 300)
+                statements = [statement for statement, parameters, executemany in recorder.statements]
+                self.assertLessEqual(len(statements), max_statements, '\n'.join(statements))
+                self.assertLessEqual(recorder.rows, max_rows)
+
+
+@unittest.skipUnless(os.environ.get('DATABASE_URL', '').startswith('postgres'),
+                     'Query plans are checked on PostgreSQL only')
+class QueryPlanTestCase(unittest.TestCase):
+    """
+    Runs EXPLAIN (FORMAT JSON) on every SELECT of the targeted endpoints,
+    against a seeded dataset large enough for the planner to prefer indexes,
+    and fails on sequential scans of the hot tables.
+    """
+    # GET /events without filters lists every event and is not targeted
+    ENDPOINTS = [
+        '/events?from=2030-06-01&to=2030-06-08',
+        '/events/{event_id}',
+        '/events?ids={event_id}&include=schedules,attendees',
+        '/events/calendar?from=2030-06-01&to=2030-06-08&level=events',
+        '/events/calendar?from=2030-06-01&to=2030-06-08&level=schedules',
+        '/events/search?q=Benchmark',
+        '/events/{event_id}/schedule/conflicts',
+        '/events/{event_id}/calendar.ics',
+        '/attendees/{attendee_id}/events',
+        '/organizers/{organizer_id}/stats',
+        '/schedule?date=2030-06-03',
+        '/schedule?date=2030-06-03&organizer_id={organizer_id}',
+    ]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.app = create_app()
+        with cls.app.app_context():
+            db.create_all()
+            seed = [
+                f"INSERT INTO events (name, description, date, organizer_id, attendee_count, schedule_count) "
+                f"SELECT 'Seeded event ' || g, 'Seeded', TIMESTAMP '2025-01-01' + g * INTERVAL '3 hours', "
+                f"g % 500, {SEED_ATTENDEES_PER_EVENT}, {SEED_SCHEDULES_PER_EVENT} "
+                f"FROM generate_series(1, {SEED_EVENTS}) AS g",
+                f"INSERT INTO schedules (title, start_time, end_time, event_id) "
+                f"SELECT 'Seeded slot ' || s, e.date + s * INTERVAL '1 hour', e.date + (s + 1) * INTERVAL '1 hour', e.id "
+                f"FROM events e CROSS JOIN generate_series(0, {SEED_SCHEDULES_PER_EVENT - 1}) AS s",
+                f"INSERT INTO attendees (name, email) "
+                f"SELECT 'Seeded attendee ' || g, 'seeded' || g || '@example.com' "
+                f"FROM generate_series(1, {SEED_EVENTS}) AS g",
+                f"INSERT INTO attendances (attendee_id, event_id) "
+                f"SELECT first.id + (e.id * 7 + k * 13) % {SEED_EVENTS}, e.id "
+                f"FROM events e CROSS JOIN generate_series(0, {SEED_ATTENDEES_PER_EVENT - 1}) AS k "
+                f"CROSS JOIN (SELECT min(id) AS id FROM attendees WHERE email LIKE 'seeded%') AS first",
+                "INSERT INTO events (name, description, date, organizer_id) "
+                "VALUES ('Benchmark Summit', 'Query plan fixture', '2030-06-03 09:00', 7)",
+            ]
+            for statement in seed:
+                db.session.execute(text(statement))
+            db.session.commit()
+            OrganizerStats.refresh()
+            cls.ids = {
+                'event_id': db.session.execute(text("SELECT id FROM events WHERE name = 'Benchmark Summit'")).scalar(),
+                'attendee_id': db.session.execute(text("SELECT min(attendee_id) FROM attendances")).scalar(),
+                'organizer_id': 7
+            }
+        # ANALYZE cannot run inside the session's transaction
+        with cls.app.app_context():
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text('VACUUM ANALYZE'))
+
+    @classmethod
+    def tearDownClass(cls):
+        with cls.app.app_context():
+            db.session.query(OrganizerStats).delete()
+            db.session.query(Change).delete()
+            db.session.execute(attendances.delete())
+            db.session.query(Attendee).delete()
+            db.session.query(Schedule).delete()
+            db.session.query(Event).delete()
+            db.session.commit()
+
+    def setUp(self):
+        """Executed before each test."""
+        self.client = self.app.test_client
+        with open('auth_config.json', 'r') as f:
+            self.auth = json.loads(f.read())
+        self.headers = {"Authorization": f'Bearer {self.auth["roles"]["Admin"]["jwt_token"]}'}
+
+    def tearDown(self):
+        limiter.reset()
+
+    def test_no_sequential_scans_of_hot_tables(self):
+        for url in self.ENDPOINTS:
+            url = url.format(**self.ids)
+            with self.subTest(url=url):
+                with self.app.app_context():
+                    with QueryRecorder(db.engine) as recorder:
+                        res = self.client().get(url, headers=self.headers)
+                        res.get_data()
+                    self.assertEqual(res.status_code, 200)
+
+                    connection = db.engine.raw_connection()
+                    try:
+                        cursor = connection.cursor()
+                        for statement, parameters in recorder.selects():
+                            cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+                            plan = cursor.fetchone()[0][0]['Plan']
+                            scanned = HOT_TABLES.intersection(seq_scans(plan))
+                            self.assertFalse(scanned, f'Sequential scan of {scanned} in:\n{statement}')
+                    finally:
+                        connection.close()
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()